@@ -27,6 +27,9 @@ class AchievementResource(Model):
         "rewards",
         "achievable",
         "firstball",
+        "firstball_scope",
+        "start_date",
+        "end_date",
         "created_at",
     ]
 
@@ -1,10 +1,11 @@
-from ballsdex.core.models import (
-    Achievement, # ADD THIS IMPORT
-)
+from ballsdex.core.models import achievements # ADD THIS IMPORT
+from ballsdex.core.utils.achievement_cache import achievement_cache # ADD THIS IMPORT
+from ballsdex.core.utils.catch_names import catch_names # ADD THIS IMPORT
 
 PACKAGES = ["config", "players", "countryballs", "info", "admin", "trade", "balls", "battle", "achievements"] # ADD ACHIEVEMENTS PACKAGE TO PACKAGES LIST
 
-achievements.clear()
-for achievement in await Achievement.all():
-    achievements[achievement.pk] = achievement
-table.add_row("Achievements", str(len(achievements))) # FIND YOUR LOAD_CACHE FUNCTION AND ADD THIS THERE
+achievement_cache.prefetch() # PUT THIS AT THE START OF YOUR LOAD_CACHE FUNCTION, the snapshot and the achievements are read while the other caches load
+
+source = await achievement_cache.install() # must run after the balls and specials caches are filled, indexes the achievements
+catch_names.rebuild() # this too
+table.add_row("Achievements", f"{len(achievements)} (from {source})") # FIND YOUR LOAD_CACHE FUNCTION AND ADD THIS THERE
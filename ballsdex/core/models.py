@@ -1,6 +1,453 @@
 # ADD THIS STUFF TO YOUR MODELS.PY
+# (also add "import logging", "import math", "import re", "import time"
+# and "from bisect import bisect_right" to your imports)
+
+log = logging.getLogger("ballsdex.core.models")
 
 achievements: dict[int, Achievement] = {}
+# ball pk -> pks of the achievements listing that ball in their requirements
+achievements_by_ball: dict[int, set[int]] = {}
+# ball pk (None for any ball) -> pks of the firstball achievements rewarding its first catch
+firstball_by_ball: dict[int | None, set[int]] = {}
+# whether a firstball achievement rewards the first catch in each server
+firstball_server_scope = False
+ball_pks_by_country: dict[str, int] = {}
+special_pks_by_name: dict[str, int] = {}
+# achievement pk -> pks of the achievements requiring one of its reward balls
+achievement_dependents: dict[int, set[int]] = {}
+# achievement pk -> position in a topological order of `achievement_dependents`
+achievement_rank: dict[int, int] = {}
+# bumped every time the achievements cache is rebuilt
+achievements_version = 0
+
+# "any K of {A, B, C}"
+ANY_CLAUSE = re.compile(r"any\s+(\d+)\s+of\s*\{(.*)\}", re.IGNORECASE)
+# "5x A", "✨ A" or "5x ✨ A"
+COUNT_CLAUSE = re.compile(r"(?:(\d+)\s*x\s+)?(✨\s*)?(.+)", re.IGNORECASE)
+# trailing "(during event)" or "(with Special)"
+CLAUSE_MODIFIER = re.compile(r"\s*\((?:(during event)|with\s+([^()]+))\)$", re.IGNORECASE)
+
+def parse_requirement(
+    text: str,
+) -> tuple[tuple[str, ...], int, bool, int, bool, str | None]:
+    """
+    Parse one requirement clause, without resolving the ball and special names.
+
+    Supported clauses are a ball name, `5x name` (at least 5 of this ball), `✨ name` (a shiny
+    one, combinable as `5x ✨ name`) and `any 2 of {name, name, ...}` (at least one of any 2
+    of the listed balls). Any of them can end with `(during event)`, only counting the balls
+    caught between the start and end dates of the achievement, and/or `(with special)`, only
+    counting the balls caught with this special.
+
+    Returns
+    -------
+    tuple[tuple[str, ...], int, bool, int, bool, str | None]
+        The ball names, the quantity required of each ball, if they must be shiny, how
+        many of the balls must be owned, if they must be caught during the achievement's
+        window, and the special they must have.
+    """
+    text = text.strip()
+    windowed = False
+    special = None
+    while match := CLAUSE_MODIFIER.search(text):
+        if match.group(1):
+            windowed = True
+        else:
+            special = match.group(2).strip()
+        text = text[: match.start()].strip()
+    if match := ANY_CLAUSE.fullmatch(text):
+        names = tuple(dict.fromkeys(x.strip() for x in match.group(2).split(",") if x.strip()))
+        return names, 1, False, max(min(int(match.group(1)), len(names)), 1), windowed, special
+    match = COUNT_CLAUSE.fullmatch(text)
+    if match is None:
+        # only modifiers
+        return (), 1, False, 1, windowed, special
+    return (
+        (match.group(3).strip(),),
+        max(int(match.group(1) or 1), 1),
+        bool(match.group(2)),
+        1,
+        windowed,
+        special,
+    )
+
+class RequirementClause:
+    """
+    A parsed requirement of an achievement: at least `needed` of `balls`, each owned
+    `quantity` times (shiny ones only if `shiny`, caught in the achievement's window only if
+    `windowed`, with a special only if `special_id`).
+
+    The progress counters don't know when or with what special a ball was caught, for
+    constrained clauses they only give an upper bound and the database has the final say.
+
+    Attributes
+    ----------
+    text: str
+        The clause as written.
+    balls: tuple[tuple[int, str], ...]
+        Pk and name of each listed ball.
+    quantity: int
+        Copies required of a ball for it to count.
+    shiny: bool
+        Only shiny copies count.
+    needed: int
+        Number of listed balls that must be owned.
+    windowed: bool
+        Only balls caught between the achievement's start and end dates count.
+    special_id: int | None
+        Only balls caught with this special count.
+    """
+
+    __slots__ = ("text", "balls", "quantity", "shiny", "needed", "windowed", "special_id")
+
+    def __init__(
+        self,
+        text: str,
+        balls: tuple[tuple[int, str], ...],
+        quantity: int,
+        shiny: bool,
+        needed: int,
+        windowed: bool = False,
+        special_id: int | None = None,
+    ):
+        self.text = text
+        self.balls = balls
+        self.quantity = quantity
+        self.shiny = shiny
+        self.needed = needed
+        self.windowed = windowed
+        self.special_id = special_id
+
+    @property
+    def constrained(self) -> bool:
+        """
+        Depends on when or how the balls were caught, not only on owning them.
+        """
+        return self.windowed or self.special_id is not None
+
+    @property
+    def simple(self) -> bool:
+        """
+        A single ball, owning one copy is enough.
+        """
+        return (
+            len(self.balls) == 1 and self.quantity == 1 and not self.shiny and not self.constrained
+        )
+
+    def progress(self, counts: dict[int, int], shiny_counts: dict[int, int]) -> int:
+        """
+        Number of listed balls owned enough times, given the per-ball copy counts.
+        """
+        source = shiny_counts if self.shiny else counts
+        return sum(1 for ball_id, _ in self.balls if source.get(ball_id, 0) >= self.quantity)
+
+    def units(self, counts: dict[int, int], shiny_counts: dict[int, int]) -> tuple[int, int]:
+        """
+        Progress of the clause as (done, total): copies for a single ball, balls owned
+        enough times for a list.
+        """
+        if len(self.balls) == 1:
+            source = shiny_counts if self.shiny else counts
+            return min(source.get(self.balls[0][0], 0), self.quantity), self.quantity
+        return min(self.progress(counts, shiny_counts), self.needed), self.needed
+
+    def describe(self, counts: dict[int, int], shiny_counts: dict[int, int]) -> str:
+        """
+        The clause text with the current progress of counted clauses.
+        """
+        if self.simple:
+            return self.text
+        return "{} ({}/{})".format(self.text, *self.units(counts, shiny_counts))
+
+class CompiledAchievement:
+    """
+    Parsed requirements and rewards of an `Achievement`, resolved against the balls cache.
+    Built once when the achievement is cached, read-only afterwards.
+
+    Requirements are evaluated against a player's progress, anything with `owned` (bitset
+    of the distinct ball pks owned), `counts` and `shiny` (ball pk -> owned copies, and
+    owned shiny copies) attributes.
+
+    Attributes
+    ----------
+    clauses: tuple[RequirementClause, ...]
+        Every requirement clause that only lists known balls.
+    requirement_names: tuple[str, ...]
+        Every requirement as written, including unknown ones.
+    ball_ids: frozenset[int]
+        Pks of every ball listed in the clauses.
+    mask: int
+        Bitset of the balls that must be owned at least once (single-ball clauses).
+    rewards: tuple[tuple[int, bool, int], ...]
+        Pk, shiny flag and quantity of each reward ball.
+    unknown: tuple[str, ...]
+        Requirement names that don't match any ball, they can never be fulfilled.
+    unknown_rewards: tuple[str, ...]
+        Reward names that don't match any ball, they are never given.
+    constrained: bool
+        Some clauses depend on when or how the balls were caught, `completed` is then only
+        a necessary condition, confirmed with `get_completed_achievements`.
+    """
+
+    __slots__ = (
+        "clauses",
+        "requirement_names",
+        "ball_ids",
+        "mask",
+        "rewards",
+        "unknown",
+        "unknown_rewards",
+        "constrained",
+        "_counted",
+    )
+
+    def __init__(
+        self,
+        clauses: tuple[RequirementClause, ...],
+        requirement_names: tuple[str, ...],
+        rewards: tuple[tuple[int, bool, int], ...],
+        unknown: tuple[str, ...],
+        unknown_rewards: tuple[str, ...],
+    ):
+        mask = 0
+        for clause in clauses:
+            if len(clause.balls) == 1:
+                mask |= 1 << clause.balls[0][0]
+        for attr, value in (
+            ("clauses", clauses),
+            ("requirement_names", requirement_names),
+            ("ball_ids", frozenset(ball_id for x in clauses for ball_id, _ in x.balls)),
+            ("mask", mask),
+            ("rewards", rewards),
+            ("unknown", unknown),
+            ("unknown_rewards", unknown_rewards),
+            ("constrained", any(x.constrained for x in clauses)),
+            # the clauses the mask alone can't decide
+            ("_counted", tuple(x for x in clauses if not x.simple)),
+        ):
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    @property
+    def empty(self) -> bool:
+        """
+        No requirements at all, the achievement can't be completed by collecting balls.
+        """
+        return not self.requirement_names
+
+    def completed(self, progress) -> bool:
+        """
+        Check if the player's progress fulfills every requirement.
+        """
+        if self.unknown or self.mask & ~progress.owned:
+            return False
+        return all(
+            x.progress(progress.counts, progress.shiny) >= x.needed for x in self._counted
+        )
+
+    def progress(self, progress) -> tuple[int, int]:
+        """
+        Overall progress as (done, total), summing the units of every clause. Unknown
+        requirements count as one unit that is never done.
+        """
+        done = total = 0
+        for clause in self.clauses:
+            clause_done, clause_total = clause.units(progress.counts, progress.shiny)
+            done += clause_done
+            total += clause_total
+        return done, total + len(self.unknown)
+
+    def missing(self, progress) -> list[str]:
+        """
+        Descriptions of the requirements not fulfilled by the player's progress, with the
+        progress of counted requirements.
+        """
+        return [
+            x.describe(progress.counts, progress.shiny)
+            for x in self.clauses
+            if x.progress(progress.counts, progress.shiny) < x.needed
+        ] + list(self.unknown)
+
+def compile_achievement(achievement: Achievement) -> CompiledAchievement:
+    requirement_names = tuple(
+        x.strip() for x in (achievement.requirements or "").split(";") if x.strip()
+    )
+    clauses: list[RequirementClause] = []
+    unknown: list[str] = []
+    for text in requirement_names:
+        names, quantity, shiny, needed, windowed, special = parse_requirement(text)
+        known = [(ball_pks_by_country[x], x) for x in names if x in ball_pks_by_country]
+        unknown.extend(x for x in names if x not in ball_pks_by_country)
+        special_id = special_pks_by_name.get(special) if special else None
+        if special and special_id is None:
+            unknown.append(special)
+        elif names and len(known) == len(names):
+            clauses.append(
+                RequirementClause(
+                    text, tuple(known), quantity, shiny, needed, windowed, special_id
+                )
+            )
+        elif not names:
+            unknown.append(text)
+
+    reward_count: dict[tuple[int, bool], int] = {}
+    unknown_rewards: list[str] = []
+    for reward in (achievement.rewards or "").split(";"):
+        reward = reward.strip()
+        if not reward:
+            continue
+        shiny = reward.startswith("✨ ")
+        name = reward[2:].strip() if shiny else reward
+        ball_id = ball_pks_by_country.get(name)
+        if ball_id is None:
+            unknown_rewards.append(reward)
+        else:
+            reward_count[ball_id, shiny] = reward_count.get((ball_id, shiny), 0) + 1
+
+    if unknown or unknown_rewards:
+        log.warning(
+            f"Achievement {achievement.name} has unknown requirements {unknown} "
+            f"and unknown rewards {unknown_rewards}"
+        )
+    return CompiledAchievement(
+        clauses=tuple(clauses),
+        requirement_names=requirement_names,
+        rewards=tuple((ball_id, shiny, count) for (ball_id, shiny), count in reward_count.items()),
+        unknown=tuple(unknown),
+        unknown_rewards=tuple(unknown_rewards),
+    )
+
+class AchievementSchedule:
+    """
+    Start and end dates of the dated achievements, precomputed when the cache is indexed.
+
+    The set of achievements outside their window only changes at one of the sorted
+    boundaries, so it's computed once per interval between two boundaries and a catch only
+    compares the current time with the next one. Windows are half-open: active from
+    `start_date` included to `end_date` excluded, a missing date is unbounded.
+    """
+
+    def __init__(self):
+        self._windows: dict[int, tuple[float, float]] = {}
+        self._boundaries: list[float] = []
+        self._inactive: frozenset[int] = frozenset()
+        # the interval during which _inactive is valid
+        self._valid_from = math.inf
+        self._valid_until = -math.inf
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def rebuild(self, achievements: Iterable[Achievement]):
+        self._windows = {
+            achievement.pk: (
+                achievement.start_date.timestamp() if achievement.start_date else -math.inf,
+                achievement.end_date.timestamp() if achievement.end_date else math.inf,
+            )
+            for achievement in achievements
+            if achievement.start_date or achievement.end_date
+        }
+        self._boundaries = sorted(
+            {x for window in self._windows.values() for x in window if math.isfinite(x)}
+        )
+        self._valid_from = math.inf
+        self._valid_until = -math.inf
+
+    def inactive(self, now: float | None = None) -> frozenset[int]:
+        """
+        Pks of the achievements outside their window at this timestamp (defaults to now).
+        """
+        now = time.time() if now is None else now
+        if not self._valid_from <= now < self._valid_until:
+            i = bisect_right(self._boundaries, now)
+            self._valid_from = self._boundaries[i - 1] if i else -math.inf
+            self._valid_until = self._boundaries[i] if i < len(self._boundaries) else math.inf
+            self._inactive = frozenset(
+                pk for pk, (start, end) in self._windows.items() if not start <= now < end
+            )
+        return self._inactive
+
+    def active(self, achievement_id: int, now: float | None = None) -> bool:
+        return achievement_id not in self.inactive(now)
+
+achievement_schedule = AchievementSchedule()
+
+def index_achievement_requirements(recompile: bool = True):
+    """
+    Rebuild `ball_pks_by_country` and `special_pks_by_name`, then recompile every cached
+    achievement and rebuild `achievements_by_ball`, `firstball_by_ball`,
+    `firstball_server_scope` and `achievement_schedule`.
+
+    Pass `recompile=False` to keep the compiled data already set (restored from a snapshot),
+    only the achievements without one are compiled.
+    """
+    global achievements_version, firstball_server_scope
+    achievements_version += 1
+    ball_pks_by_country.clear()
+    ball_pks_by_country.update({ball.country: pk for pk, ball in balls.items()})
+    special_pks_by_name.clear()
+    special_pks_by_name.update({special.name: pk for pk, special in specials.items()})
+    achievements_by_ball.clear()
+    firstball_by_ball.clear()
+    firstball_server_scope = False
+    for achievement in achievements.values():
+        if recompile or achievement._compiled is None:
+            achievement.compiled = compile_achievement(achievement)
+        if achievement.firstball:
+            # given for catching the ball first, not for owning it
+            for ball_id in achievement.compiled.ball_ids or (None,):
+                firstball_by_ball.setdefault(ball_id, set()).add(achievement.pk)
+            if achievement.firstball_scope == FirstBallScope.SERVER:
+                firstball_server_scope = True
+            continue
+        for ball_id in achievement.compiled.ball_ids:
+            achievements_by_ball.setdefault(ball_id, set()).add(achievement.pk)
+    achievement_schedule.rebuild(achievements.values())
+    index_achievement_dependencies()
+
+def index_achievement_dependencies():
+    """
+    Rebuild `achievement_dependents` and `achievement_rank` from the compiled achievements.
+
+    Achievements are ranked with Kahn's algorithm, so rewards are granted before the
+    requirements they fulfill are evaluated. Achievements in a cycle (rewarding each other's
+    requirements) are ranked last, in pk order.
+    """
+    achievement_dependents.clear()
+    achievement_rank.clear()
+    incoming: dict[int, int] = {pk: 0 for pk in achievements}
+    for pk, achievement in achievements.items():
+        dependents = {
+            dependent
+            for ball_id, _, _ in achievement.compiled.rewards
+            for dependent in achievements_by_ball.get(ball_id, ())
+            # rewarding its own requirement changes nothing, it's already completed
+            if dependent != pk
+        }
+        if dependents:
+            achievement_dependents[pk] = dependents
+            for dependent in dependents:
+                incoming[dependent] += 1
+
+    ready = sorted(pk for pk, count in incoming.items() if count == 0)
+    while ready:
+        pk = ready.pop()
+        achievement_rank[pk] = len(achievement_rank)
+        for dependent in achievement_dependents.get(pk, ()):
+            incoming[dependent] -= 1
+            if incoming[dependent] == 0:
+                ready.append(dependent)
+
+    cyclic = sorted(pk for pk in achievements if pk not in achievement_rank)
+    if cyclic:
+        log.warning(
+            "Achievements in or depending on a cycle of rewards and requirements, they are "
+            f"evaluated until nothing changes: {[achievements[pk].name for pk in cyclic]}"
+        )
+    for pk in cyclic:
+        achievement_rank[pk] = len(achievement_rank)
 
 async def convert_req_to_list(
     model: Type[Achievement],
@@ -13,6 +460,7 @@ async def convert_req_to_list(
         instance.requirements = ";".join(
             [x.strip() for x in instance.requirements.split(";")]
         )
+    instance.compiled = None
 
 async def convert_rew_to_list(
     model: Type[Achievement],
@@ -25,13 +473,22 @@ async def convert_rew_to_list(
         instance.rewards = ";".join(
             [x.strip() for x in instance.rewards.split(";")]
         )
+    instance.compiled = None
+
+class FirstBallScope(IntEnum):
+    GLOBAL = 1
+    SERVER = 2
 
 class Achievement(models.Model):
     name = fields.CharField(max_length=48, unique=True)
     requirements = fields.TextField(
         null=True,
         default=None,
-        description="Requirements for getting this achievement seperated by semicolons (please enter the correct name of the ball else wont work properly)",
+        description="Requirements for getting this achievement seperated by semicolons (please enter the correct name of the ball else wont work properly). "
+        "Use \"5x name\" to require several copies, \"✨ name\" for a shiny one "
+        "and \"any 2 of {name, name, name}\" for some of a list. "
+        "End one with \"(during event)\" to only count the balls caught between the start "
+        "and end dates, or \"(with special)\" for the balls caught with a special",
     )
     simplified_req = fields.CharField(max_length=48, null=True, description="(Optional) This will be displayed in /achievements list. Use this if you have too many requirements")
     rewards = fields.TextField(
@@ -40,16 +497,73 @@ class Achievement(models.Model):
         description="Reward(s) for getting the achievement",
     )
     achievable = fields.BooleanField(default=True)
-    firstball = fields.BooleanField(default=False)
+    firstball = fields.BooleanField(
+        default=False,
+        description="Given to the first player catching one of the required balls "
+        "(any ball if there are no requirements) instead of the players owning them",
+    )
+    firstball_scope = fields.IntEnumField(
+        FirstBallScope,
+        default=FirstBallScope.GLOBAL,
+        description="First catch of the whole bot or of each server",
+    )
+    start_date = fields.DatetimeField(
+        null=True, default=None, description="(Optional) Can't be obtained before this date"
+    )
+    end_date = fields.DatetimeField(
+        null=True, default=None, description="(Optional) Can't be obtained after this date"
+    )
     created_at = fields.DatetimeField(auto_now_add=True, null=True)
 
     instances: fields.BackwardFKRelation[AchievementInstance]
 
+    _compiled: CompiledAchievement | None = None
+
     def __str__(self) -> str:
         return self.name
+
+    @property
+    def compiled(self) -> CompiledAchievement:
+        if self._compiled is None:
+            self._compiled = compile_achievement(self)
+        return self._compiled
+
+    @compiled.setter
+    def compiled(self, value: CompiledAchievement | None):
+        # set to None to recompile on next access
+        self._compiled = value
     
 Achievement.register_listener(signals.Signals.pre_save, convert_req_to_list)
 Achievement.register_listener(signals.Signals.pre_save, convert_rew_to_list)
+
+async def cache_saved_achievement(
+    model: Type[Achievement],
+    instance: Achievement,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    from ballsdex.core.utils.invalidation import invalidation_bus  # lazy like the caches below
+
+    achievements[instance.pk] = instance
+    # convert_req_to_list reset its compiled data, the others keep theirs
+    index_achievement_requirements(recompile=False)
+    # the other processes reload it
+    await invalidation_bus.publish("achievement", instance.pk, using_db=using_db)
+
+async def uncache_deleted_achievement(
+    model: Type[Achievement],
+    instance: Achievement,
+    using_db: "BaseDBAsyncClient | None" = None,
+):
+    from ballsdex.core.utils.invalidation import invalidation_bus  # lazy like the caches below
+
+    achievements.pop(instance.pk, None)
+    index_achievement_requirements(recompile=False)
+    await invalidation_bus.publish("achievement", instance.pk, "delete", using_db=using_db)
+
+Achievement.register_listener(signals.Signals.post_save, cache_saved_achievement)
+Achievement.register_listener(signals.Signals.post_delete, uncache_deleted_achievement)
     
 class AchievementInstance(models.Model):
     achievement_id: int
@@ -63,7 +577,7 @@ class AchievementInstance(models.Model):
     )
 
     class Meta:
-        unique_together = ("player", "id")
+        unique_together = ("player", "achievement")
 
     @property
     def is_achievable(self) -> bool:
@@ -78,4 +592,219 @@ class AchievementInstance(models.Model):
     def to_string(self, bot: discord.Client | None = None) -> str:
         return f"#{self.pk:0X}: {self.achievement.name}"
 
+class AchievementRequirement(models.Model):
+    """
+    One ball listed by a requirement clause of an achievement, mirrors
+    `Achievement.requirements` for SQL evaluation (see `parse_requirement`).
+    """
+
+    achievement_id: int
+    ball_id: int
+    special_id: int | None
+
+    achievement: fields.ForeignKeyRelation[Achievement] = fields.ForeignKeyField(
+        "models.Achievement", related_name="requirement_balls", on_delete=fields.CASCADE
+    )
+    clause = fields.SmallIntField(default=0, description="Index of the clause in the requirements")
+    ball: fields.ForeignKeyRelation[Ball] = fields.ForeignKeyField(
+        "models.Ball", related_name="achievement_requirements", on_delete=fields.CASCADE
+    )
+    quantity = fields.IntField(default=1, description="Copies required of this ball")
+    shiny = fields.BooleanField(default=False, description="Only shiny copies count")
+    needed = fields.SmallIntField(
+        default=1, description="Balls of the clause that must be owned"
+    )
+    windowed = fields.BooleanField(
+        default=False, description="Only balls caught during the achievement's window count"
+    )
+    special: fields.ForeignKeyNullableRelation[Special] = fields.ForeignKeyField(
+        "models.Special",
+        null=True,
+        default=None,
+        related_name="achievement_requirements",
+        on_delete=fields.CASCADE,
+    )
+
+    class Meta:
+        unique_together = ("achievement", "clause", "ball")
+
+def requirement_rows(
+    requirements: str | None, ball_ids: dict[str, int], special_ids: dict[str, int]
+) -> set[tuple[int, int, int, bool, int, bool, int | None]]:
+    """
+    The `AchievementRequirement` rows of a requirements text, as (clause, ball pk, quantity,
+    shiny, needed, windowed, special pk) tuples, given the pks of the names it uses.
+    Clauses listing unknown balls or specials can't be completed, they're left out like in
+    the cache.
+    """
+    clauses = [parse_requirement(x) for x in (requirements or "").split(";") if x]
+    return {
+        (i, ball_ids[name], quantity, shiny, needed, windowed, special_ids.get(special))
+        for i, (names, quantity, shiny, needed, windowed, special) in enumerate(clauses)
+        if all(x in ball_ids for x in names) and (not special or special in special_ids)
+        for name in names
+    }
+
+def requirement_instances(
+    achievement_id: int, rows: Iterable[tuple[int, int, int, bool, int, bool, int | None]]
+) -> list[AchievementRequirement]:
+    return [
+        AchievementRequirement(
+            achievement_id=achievement_id,
+            clause=clause,
+            ball_id=ball_id,
+            quantity=quantity,
+            shiny=shiny,
+            needed=needed,
+            windowed=windowed,
+            special_id=special_id,
+        )
+        for clause, ball_id, quantity, shiny, needed, windowed, special_id in rows
+    ]
+
+async def sync_achievement_requirements(
+    model: Type[Achievement],
+    instance: Achievement,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    clauses = [parse_requirement(x) for x in (instance.requirements or "").split(";") if x]
+    names = {name for names, *_ in clauses for name in names}
+    special_names = {x[5] for x in clauses if x[5]}
+    # resolved from the database, the caches aren't loaded in the admin panel
+    ball_ids = dict(
+        await Ball.filter(country__in=names).using_db(using_db).values_list("country", "id")
+    ) if names else {}
+    special_ids = dict(
+        await Special.filter(name__in=special_names).using_db(using_db).values_list("name", "id")
+    ) if special_names else {}
+    wanted = requirement_rows(instance.requirements, ball_ids, special_ids)
+    current = set(
+        await AchievementRequirement.filter(achievement_id=instance.pk)
+        .using_db(using_db)
+        .values_list("clause", "ball_id", "quantity", "shiny", "needed", "windowed", "special_id")
+    )
+    if current == wanted:
+        return
+    await AchievementRequirement.filter(achievement_id=instance.pk).using_db(using_db).delete()
+    await AchievementRequirement.bulk_create(
+        requirement_instances(instance.pk, wanted), using_db=using_db
+    )
+
+Achievement.register_listener(signals.Signals.post_save, sync_achievement_requirements)
+
+class FirstCatch(models.Model):
+    """
+    First catch of a ball, on the whole bot (`server_id` 0) or in a server. The unique
+    constraint decides which player was first when catches race.
+    """
+
+    ball_id: int
+    player_id: int
+
+    ball: fields.ForeignKeyRelation[Ball] = fields.ForeignKeyField(
+        "models.Ball", related_name="first_catches", on_delete=fields.CASCADE
+    )
+    server_id = fields.BigIntField(default=0, description="0 for the first catch of the bot")
+    player: fields.ForeignKeyRelation[Player] = fields.ForeignKeyField(
+        "models.Player", related_name="first_catches", on_delete=fields.CASCADE
+    )
+    caught_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("ball", "server_id")
+
+async def update_owned_balls(
+    model: Type[BallInstance],
+    instance: BallInstance,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    from ballsdex.core.utils.achievements import owned_balls  # circular import
+
+    if created:
+        owned_balls.add(instance.player_id, (instance.ball_id, instance.shiny))
+    else:
+        # may be a trade, the previous owner is kept in trade_player, but the fields before
+        # the save aren't known so the counters can't be adjusted
+        owned_balls.invalidate(instance.player_id)
+        if instance.trade_player_id:
+            owned_balls.invalidate(instance.trade_player_id)
+
+async def remove_owned_ball(
+    model: Type[BallInstance],
+    instance: BallInstance,
+    using_db: "BaseDBAsyncClient | None" = None,
+):
+    from ballsdex.core.utils.achievements import owned_balls  # circular import
+
+    owned_balls.remove(instance.player_id, (instance.ball_id, instance.shiny))
+
+BallInstance.register_listener(signals.Signals.post_save, update_owned_balls)
+BallInstance.register_listener(signals.Signals.post_delete, remove_owned_ball)
+
+async def invalidate_guild_config(
+    model: Type[GuildConfig],
+    instance: GuildConfig,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    from ballsdex.core.utils.guild_config import guild_configs  # circular import
+
+    # a new config can't be cached yet, and the cache creates the missing configs itself
+    if not created:
+        guild_configs.invalidate(instance.guild_id)
+
+async def uncache_deleted_guild_config(
+    model: Type[GuildConfig],
+    instance: GuildConfig,
+    using_db: "BaseDBAsyncClient | None" = None,
+):
+    from ballsdex.core.utils.guild_config import guild_configs  # circular import
+
+    guild_configs.invalidate(instance.guild_id)
+
+GuildConfig.register_listener(signals.Signals.post_save, invalidate_guild_config)
+GuildConfig.register_listener(signals.Signals.post_delete, uncache_deleted_guild_config)
+
+async def refresh_catch_names(
+    model: Type[Ball],
+    instance: Ball,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    from ballsdex.core.utils.catch_names import catch_names  # circular import
+
+    catch_names.refresh(instance)
+
+async def resync_ball_requirements(
+    model: Type[Ball],
+    instance: Ball,
+    created: bool,
+    using_db: "BaseDBAsyncClient | None" = None,
+    update_fields: Iterable[str] | None = None,
+):
+    # clauses naming this ball were left out of the requirement rows while it didn't exist
+    for achievement in await Achievement.filter(
+        requirements__icontains=instance.country
+    ).using_db(using_db):
+        await sync_achievement_requirements(Achievement, achievement, False, using_db)
+
+async def remove_catch_names(
+    model: Type[Ball],
+    instance: Ball,
+    using_db: "BaseDBAsyncClient | None" = None,
+):
+    from ballsdex.core.utils.catch_names import catch_names  # circular import
+
+    catch_names.remove(instance.pk)
+
+Ball.register_listener(signals.Signals.post_save, refresh_catch_names)
+Ball.register_listener(signals.Signals.post_save, resync_ball_requirements)
+Ball.register_listener(signals.Signals.post_delete, remove_catch_names)
+
 # ADD THESE AT THE VERY END OF YOUR MODELS.PY FILE
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from tortoise import fields
+
+from ballsdex.core import models
+from ballsdex.core.models import (
+    Achievement,
+    CompiledAchievement,
+    RequirementClause,
+    achievements,
+    balls,
+    index_achievement_requirements,
+    specials,
+)
+
+log = logging.getLogger("ballsdex.core.utils.achievement_cache")
+
+SNAPSHOT_PATH = Path("achievements-snapshot.json")
+# bump when the snapshot layout or the compiled classes change
+SNAPSHOT_FORMAT = 2
+
+
+def achievement_row(achievement: Achievement) -> dict[str, Any]:
+    """
+    The columns of an achievement as JSON values: dates as ISO strings, enums as their value.
+    """
+    row = {}
+    for name, column in Achievement._meta.fields_db_projection.items():
+        value = getattr(achievement, name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, Enum):
+            value = value.value
+        row[column] = value
+    return row
+
+
+def achievement_from_row(row: dict[str, Any]) -> Achievement:
+    values = dict(row)
+    for name, field in Achievement._meta.fields_map.items():
+        column = Achievement._meta.fields_db_projection.get(name)
+        if isinstance(field, fields.DatetimeField) and values.get(column):
+            values[column] = datetime.fromisoformat(values[column])
+    return Achievement._init_from_db(**values)
+
+
+def compiled_to_json(compiled: CompiledAchievement) -> dict[str, Any]:
+    """
+    The constructor arguments of compiled data, the derived attributes are recomputed.
+    """
+    return {
+        "clauses": [
+            [x.text, x.balls, x.quantity, x.shiny, x.needed, x.windowed, x.special_id]
+            for x in compiled.clauses
+        ],
+        "requirement_names": compiled.requirement_names,
+        "rewards": compiled.rewards,
+        "unknown": compiled.unknown,
+        "unknown_rewards": compiled.unknown_rewards,
+    }
+
+
+def compiled_from_json(data: dict[str, Any]) -> CompiledAchievement:
+    return CompiledAchievement(
+        clauses=tuple(
+            RequirementClause(
+                text,
+                tuple((ball_id, name) for ball_id, name in listed),
+                quantity,
+                shiny,
+                needed,
+                windowed,
+                special_id,
+            )
+            for text, listed, quantity, shiny, needed, windowed, special_id in data["clauses"]
+        ),
+        requirement_names=tuple(data["requirement_names"]),
+        rewards=tuple((ball_id, shiny, count) for ball_id, shiny, count in data["rewards"]),
+        unknown=tuple(data["unknown"]),
+        unknown_rewards=tuple(data["unknown_rewards"]),
+    )
+
+
+def catalogue_version(rows: list[dict[str, Any]]) -> str:
+    """
+    Digest of the achievement rows, changes whenever an achievement is added, edited or removed.
+    """
+    digest = hashlib.sha256()
+    for row in sorted(rows, key=lambda x: x["id"]):
+        digest.update(json.dumps(row, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def names_version() -> str:
+    """
+    Digest of the ball and special names, the compiled achievements are only valid for these.
+    """
+    digest = hashlib.sha256()
+    for pk, ball in sorted(balls.items()):
+        digest.update(f"b{pk}\0{ball.country}\n".encode())
+    for pk, special in sorted(specials.items()):
+        digest.update(f"s{pk}\0{special.name}\n".encode())
+    return digest.hexdigest()
+
+
+class AchievementCacheLoader:
+    """
+    Loads the achievements cache at startup, from a local snapshot when possible.
+
+    `prefetch` starts reading the snapshot and fetching the achievements from the database,
+    call it before loading the other caches so both run concurrently with them. `install`
+    fills the cache once the balls and specials caches are loaded. With a snapshot, the cache
+    is filled right away, reusing its compiled data if the ball names didn't change, then the
+    database rows are compared with it in the background and replace it if the catalogue
+    changed. Without a snapshot, `install` waits for the database and writes one.
+    """
+
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        self.path = path
+        self.version: str | None = None
+        self.source: str | None = None
+        self._snapshot: asyncio.Task | None = None
+        self._fetch: asyncio.Task | None = None
+        self._verify: asyncio.Task | None = None
+        # achievements_version right after filling the cache
+        self._filled_version = 0
+
+    def prefetch(self):
+        self._snapshot = asyncio.create_task(asyncio.to_thread(self._read))
+        self._fetch = asyncio.create_task(self._fetch_rows())
+
+    async def install(self) -> str:
+        """
+        Fill the achievements cache, returns where it was loaded from ("snapshot" or
+        "database").
+        """
+        if self._snapshot is None or self._fetch is None:
+            self.prefetch()
+        assert self._snapshot and self._fetch
+        snapshot = await self._snapshot
+        if snapshot is None:
+            rows = await self._fetch
+            self._fill(rows, {})
+            self.version = catalogue_version(rows)
+            self.source = "database"
+            await self.save()
+            return self.source
+
+        reusable = snapshot["names"] == names_version()
+        self._fill(snapshot["rows"], snapshot["compiled"] if reusable else {})
+        self.version = snapshot["version"]
+        self.source = "snapshot"
+        self._verify = asyncio.create_task(self._refresh(stale=not reusable))
+        return self.source
+
+    def stop(self):
+        for task in (self._verify, self._fetch):
+            if task and not task.done():
+                task.cancel()
+
+    async def save(self):
+        """
+        Write the cached achievements and their compiled data to the snapshot file.
+        """
+        rows = [achievement_row(x) for x in achievements.values()]
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "version": catalogue_version(rows),
+            "names": names_version(),
+            "rows": rows,
+            "compiled": {x.pk: compiled_to_json(x.compiled) for x in achievements.values()},
+        }
+        try:
+            await asyncio.to_thread(self._write, data)
+        except OSError:
+            log.warning(f"Failed to write the achievements snapshot {self.path}", exc_info=True)
+
+    async def _fetch_rows(self) -> list[dict[str, Any]]:
+        return [achievement_row(x) for x in await Achievement.all()]
+
+    def _read(self) -> dict[str, Any] | None:
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                data = json.load(file)
+            if not isinstance(data, dict) or data.get("format") != SNAPSHOT_FORMAT:
+                return None
+            # JSON object keys are strings
+            data["compiled"] = {
+                int(pk): compiled_from_json(x) for pk, x in data["compiled"].items()
+            }
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception:
+            log.warning(f"Ignoring unreadable achievements snapshot {self.path}", exc_info=True)
+            return None
+
+    def _write(self, data: dict[str, Any]):
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with temporary.open("w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temporary, self.path)
+
+    def _fill(self, rows: list[dict[str, Any]], compiled: dict[int, CompiledAchievement]):
+        achievements.clear()
+        for row in rows:
+            achievement = achievement_from_row(row)
+            achievement.compiled = compiled.get(achievement.pk)
+            achievements[achievement.pk] = achievement
+        # only compiles the achievements without compiled data
+        index_achievement_requirements(recompile=False)
+        self._filled_version = models.achievements_version
+
+    async def _refresh(self, stale: bool = False):
+        """
+        Compare the cache restored from the snapshot with the database, reload it if the
+        catalogue changed and rewrite the snapshot if anything was outdated.
+        """
+        try:
+            assert self._fetch
+            rows = await self._fetch
+            if models.achievements_version != self._filled_version:
+                # edited since the cache was filled, the prefetched rows may be older
+                rows = await self._fetch_rows()
+            version = catalogue_version(rows)
+            if version != self.version:
+                log.info("Achievements snapshot is outdated, reloading the cache")
+                # unchanged achievements keep their compiled data
+                current = {pk: (achievement_row(x), x.compiled) for pk, x in achievements.items()}
+                self._fill(
+                    rows,
+                    {
+                        row["id"]: current[row["id"]][1]
+                        for row in rows
+                        if row["id"] in current and current[row["id"]][0] == row
+                    },
+                )
+                self.version = version
+                self.source = "database"
+                stale = True
+            if stale:
+                await self.save()
+        except Exception:
+            log.exception("Failed to refresh the achievements cache from the database")
+
+
+achievement_cache = AchievementCacheLoader()
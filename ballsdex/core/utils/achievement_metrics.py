@@ -0,0 +1,102 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+from tortoise import connections
+
+from ballsdex.core.models import achievements
+
+# counting the queries wraps every database call, set this to 0 to disable it
+QUERY_TRACING = os.environ.get("BALLSDEXBOT_ACHIEVEMENT_QUERY_TRACING", "1") != "0"
+
+evaluation_time = Histogram(
+    "achievement_evaluation_seconds", "Time spent evaluating achievements", ["source"]
+)
+interaction_queries = Histogram(
+    "achievement_interaction_queries",
+    "Database queries made by an achievement evaluation or command",
+    ["source"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+achievements_awarded = Counter("achievements_awarded", "Achievements awarded", ["achievement"])
+reward_balls_minted = Counter("achievement_reward_balls", "Reward balls given by achievements")
+
+achievements_cache_size = Gauge("achievements_cache_size", "Achievements in the cache")
+achievements_cache_size.set_function(lambda: len(achievements))
+owned_balls_cache_size = Gauge("owned_balls_cache_size", "Players in the owned balls cache")
+owned_balls_cache_hits = Gauge("owned_balls_cache_hits", "Owned balls cache hits")
+owned_balls_cache_misses = Gauge("owned_balls_cache_misses", "Owned balls cache misses")
+owned_balls_cache_memory = Gauge(
+    "owned_balls_cache_memory_bytes", "Memory used by the owned balls counters"
+)
+worker_queue_depth = Gauge("achievement_worker_queue_depth", "Pending achievement events")
+worker_rejected = Gauge(
+    "achievement_worker_rejected", "Achievement events evaluated inline because the queue was full"
+)
+
+_query_count: ContextVar[list[int] | None] = ContextVar("achievement_query_count", default=None)
+
+
+def _traced(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        counter = _query_count.get()
+        if counter is not None:
+            counter[0] += 1
+        return await func(*args, **kwargs)
+
+    wrapper.__traced__ = True  # type: ignore
+    return wrapper
+
+
+def install_query_tracing():
+    """
+    Wrap the query methods of the database client to count the queries made inside `observe`.
+    Does nothing if `QUERY_TRACING` is disabled.
+    """
+    if not QUERY_TRACING:
+        return
+    client = type(connections.get("default"))
+    for name in (
+        "execute_query",
+        "execute_query_dict",
+        "execute_insert",
+        "execute_many",
+        "execute_script",
+    ):
+        method = getattr(client, name)
+        if not getattr(method, "__traced__", False):
+            setattr(client, name, _traced(method))
+
+
+@contextmanager
+def count_queries() -> Iterator[list[int]]:
+    """
+    Count the database queries made in the enclosed block, the count is the only item of
+    the yielded list. Stays at 0 if `install_query_tracing` wasn't called.
+    """
+    counter = [0]
+    token = _query_count.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_count.reset(token)
+
+
+@contextmanager
+def observe(source: str) -> Iterator[None]:
+    """
+    Record the duration and the number of database queries of the enclosed block.
+    """
+    start = time.perf_counter()
+    with count_queries() as counter:
+        try:
+            yield
+        finally:
+            evaluation_time.labels(source=source).observe(time.perf_counter() - start)
+            if QUERY_TRACING:
+                interaction_queries.labels(source=source).observe(counter[0])
@@ -0,0 +1,104 @@
+import unicodedata
+from bisect import bisect_left
+
+from ballsdex.core import models
+from ballsdex.core.models import Achievement, achievements
+
+
+def normalize(text: str) -> str:
+    """
+    Casefold and strip the accents of a text.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(x for x in text if not unicodedata.combining(x)).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    text = f"  {text} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class AchievementSearchIndex:
+    """
+    In-memory search index over the achievement names, simplified requirements and
+    requirement ball names.
+
+    Results are ranked: exact name, name prefix, name substring, other field substring,
+    then fuzzy trigram matches which tolerate typos. The index is rebuilt lazily when the
+    achievements cache version changes.
+    """
+
+    # minimum share of the query trigrams an achievement must contain to match fuzzily
+    threshold = 0.5
+
+    def __init__(self):
+        self.version = -1
+        self._names: dict[int, str] = {}
+        self._fields: dict[int, tuple[str, ...]] = {}
+        self._sorted_names: list[tuple[str, int]] = []
+        self._trigrams: dict[str, set[int]] = {}
+
+    def rebuild(self):
+        self._names.clear()
+        self._fields.clear()
+        self._trigrams.clear()
+        for pk, achievement in achievements.items():
+            name = normalize(achievement.name)
+            self._names[pk] = name
+            self._fields[pk] = tuple(
+                normalize(x)
+                for x in (achievement.simplified_req or "", *achievement.compiled.requirement_names)
+                if x
+            )
+            grams = trigrams(name)
+            for field in self._fields[pk]:
+                grams |= trigrams(field)
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(pk)
+        self._sorted_names = sorted((name, pk) for pk, name in self._names.items())
+        self.version = models.achievements_version
+
+    def search(
+        self, query: str, *, achievable_only: bool = True, limit: int | None = 25
+    ) -> list[Achievement]:
+        if self.version != models.achievements_version:
+            self.rebuild()
+        query = normalize(query)
+        scores: dict[int, float] = {}
+
+        if not query:
+            scores = {pk: 0 for _, pk in self._sorted_names}
+        else:
+            i = bisect_left(self._sorted_names, (query,))
+            while i < len(self._sorted_names) and self._sorted_names[i][0].startswith(query):
+                name, pk = self._sorted_names[i]
+                scores[pk] = 100 if name == query else 80
+                i += 1
+
+            query_grams = trigrams(query)
+            shared: dict[int, int] = {}
+            for gram in query_grams:
+                for pk in self._trigrams.get(gram, ()):
+                    shared[pk] = shared.get(pk, 0) + 1
+            if len(query) < 3:
+                # too short for trigrams to narrow down the candidates
+                shared = {pk: 0 for pk in self._names}
+
+            for pk, count in shared.items():
+                if pk in scores:
+                    continue
+                if query in self._names[pk]:
+                    scores[pk] = 60
+                elif any(query in field for field in self._fields[pk]):
+                    scores[pk] = 40
+                elif count / len(query_grams) >= self.threshold:
+                    scores[pk] = 30 * count / len(query_grams)
+
+        results = sorted(scores, key=lambda pk: (-scores[pk], self._names[pk]))
+        found = [achievements[pk] for pk in results if pk in achievements]
+        if achievable_only:
+            found = [a for a in found if a.achievable]
+        return found[:limit] if limit is not None else found
+
+
+achievement_index = AchievementSearchIndex()
@@ -0,0 +1,99 @@
+import heapq
+import logging
+import time
+
+from tortoise.functions import Count
+
+from ballsdex.core.models import AchievementInstance, Player
+
+log = logging.getLogger("ballsdex.core.utils.achievement_stats")
+
+
+class AchievementStats:
+    """
+    Holder counts per achievement and achievement totals per player.
+
+    Counts are updated in memory on every award with `record` and periodically replaced by
+    `reconcile`, which recomputes them from the achievementinstance table.
+    """
+
+    def __init__(self):
+        # achievement pk -> number of holders
+        self.holders: dict[int, int] = {}
+        # guild id -> achievement pk -> number of holders who got it in that guild
+        self.guild_holders: dict[int, dict[int, int]] = {}
+        # player discord id -> number of achievements held
+        self.totals: dict[int, int] = {}
+        self.players = 0
+        self.last_reconcile: float | None = None
+        self._leaderboard: list[tuple[int, int]] | None = None
+        self._leaderboard_limit = 0
+
+    def record(self, discord_id: int, achievement_id: int, server_id: int | None = None):
+        self.holders[achievement_id] = self.holders.get(achievement_id, 0) + 1
+        if server_id is not None:
+            guild = self.guild_holders.setdefault(server_id, {})
+            guild[achievement_id] = guild.get(achievement_id, 0) + 1
+        total = self.totals[discord_id] = self.totals.get(discord_id, 0) + 1
+
+        board = self._leaderboard
+        if board is None:
+            return
+        # keep the cached leaderboard up to date without rescanning every player
+        if any(x == discord_id for x, _ in board):
+            board = [(x, total if x == discord_id else count) for x, count in board]
+        elif len(board) < self._leaderboard_limit or total > board[-1][1]:
+            board.append((discord_id, total))
+        else:
+            return
+        board.sort(key=lambda x: x[1], reverse=True)
+        self._leaderboard = board[: self._leaderboard_limit]
+
+    async def reconcile(self):
+        t1 = time.time()
+        holders = await (
+            AchievementInstance.annotate(count=Count("id"))
+            .group_by("achievement_id")
+            .values_list("achievement_id", "count")
+        )
+        guild_holders = await (
+            AchievementInstance.filter(server_id__isnull=False)
+            .annotate(count=Count("id"))
+            .group_by("server_id", "achievement_id")
+            .values_list("server_id", "achievement_id", "count")
+        )
+        totals = await (
+            AchievementInstance.annotate(count=Count("id"))
+            .group_by("player__discord_id")
+            .values_list("player__discord_id", "count")
+        )
+        self.players = await Player.all().count()
+
+        self.holders = dict(holders)
+        self.guild_holders = {}
+        for server_id, achievement_id, count in guild_holders:
+            self.guild_holders.setdefault(server_id, {})[achievement_id] = count
+        self.totals = dict(totals)
+        self._leaderboard = None
+        self.last_reconcile = time.time()
+        log.debug(f"Reconciled achievement stats in {(time.time() - t1) * 1000:.3f}ms")
+
+    def rarity(self, achievement_id: int) -> float | None:
+        """
+        Fraction of the players holding this achievement, None before the first reconcile.
+        """
+        if not self.players:
+            return None
+        return min(self.holders.get(achievement_id, 0) / self.players, 1)
+
+    def leaderboard(self, limit: int = 10) -> list[tuple[int, int]]:
+        """
+        The players with the most achievements, as (discord id, count) pairs.
+        """
+        if self._leaderboard is None or self._leaderboard_limit < limit:
+            self._leaderboard = heapq.nlargest(limit, self.totals.items(), key=lambda x: x[1])
+            self._leaderboard_limit = limit
+        return self._leaderboard[:limit]
+
+
+achievement_stats = AchievementStats()
@@ -1,9 +1,518 @@
-from ballsdex.core.models import Achievement, AchievementInstance
-
-async def check_if_achieved(player_id: int, achievement) -> bool:
-    a = await Achievement.get(name=achievement)
-    filters = {"player__discord_id": player_id, "achievement": a}
-    a1 = await AchievementInstance.filter(**filters)
-    if a1:
-        return True
-    return False
\ No newline at end of file
+import sys
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable
+
+import discord
+from tortoise import connections
+from tortoise.functions import Count
+from tortoise.transactions import in_transaction
+
+from ballsdex.core.models import (
+    Achievement,
+    AchievementInstance,
+    BallInstance,
+    Player,
+    achievement_dependents,
+    achievement_rank,
+    achievement_schedule,
+    achievements,
+    balls,
+)
+from ballsdex.core.utils import achievement_metrics as metrics
+from ballsdex.core.utils.achievement_stats import achievement_stats
+from ballsdex.core.utils.singleflight import KeyedLock, SingleFlight
+
+if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+class PlayerProgress:
+    """
+    Counters of the balls owned by a player, what achievement requirements are
+    evaluated against (see `CompiledAchievement.completed`).
+
+    Attributes
+    ----------
+    owned: int
+        Bitset of the distinct ball pks owned.
+    counts: dict[int, int]
+        Ball pk -> owned copies.
+    shiny: dict[int, int]
+        Ball pk -> owned shiny copies.
+    """
+
+    __slots__ = ("owned", "counts", "shiny")
+
+    def __init__(self, rows: Iterable[tuple[int, bool, int]] = ()):
+        self.owned = 0
+        self.counts: dict[int, int] = {}
+        self.shiny: dict[int, int] = {}
+        for ball_id, shiny, count in rows:
+            self.add(ball_id, shiny, count)
+
+    def copy(self) -> "PlayerProgress":
+        progress = PlayerProgress()
+        progress.owned = self.owned
+        progress.counts = self.counts.copy()
+        progress.shiny = self.shiny.copy()
+        return progress
+
+    def add(self, ball_id: int, shiny: bool, count: int = 1):
+        self.owned |= 1 << ball_id
+        self.counts[ball_id] = self.counts.get(ball_id, 0) + count
+        if shiny:
+            self.shiny[ball_id] = self.shiny.get(ball_id, 0) + count
+
+    def remove(self, ball_id: int, shiny: bool):
+        count = self.counts.get(ball_id, 0) - 1
+        if count > 0:
+            self.counts[ball_id] = count
+        else:
+            self.counts.pop(ball_id, None)
+            self.owned &= ~(1 << ball_id)
+        if shiny:
+            count = self.shiny.get(ball_id, 0) - 1
+            if count > 0:
+                self.shiny[ball_id] = count
+            else:
+                self.shiny.pop(ball_id, None)
+
+    def memory_usage(self) -> int:
+        return (
+            sys.getsizeof(self.owned) + sys.getsizeof(self.counts) + sys.getsizeof(self.shiny)
+        )
+
+
+class OwnedBallsCache:
+    """
+    Bounded LRU cache of the progress counters of each player, keyed by player pk.
+
+    Entries are loaded with one grouped query, then kept up to date incrementally: caught
+    and granted balls are added, deleted ones removed, so evaluating an achievement is a
+    mask test plus a few counter lookups instead of a database query. Balls changing owner
+    (trades) invalidate both players. Entries expire after `ttl` seconds as a safety net for
+    ownership changes that bypass the model signals (queryset updates, bulk updates).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 1800):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, PlayerProgress]] = OrderedDict()
+        # players whose entry is being fetched
+        self._loading: set[int] = set()
+        self._stale: set[int] = set()
+        self._loads = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, player_id: int) -> PlayerProgress:
+        """
+        Return the progress counters of this player, fetching them on a miss.
+        The returned object is shared with the cache and must not be modified.
+        """
+        entry = self._entries.get(player_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(player_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        # concurrent misses share one fetch, so they can't overwrite each other's result
+        return await self._loads.run(player_id, self._load, player_id)
+
+    async def _load(self, player_id: int) -> PlayerProgress:
+        self._loading.add(player_id)
+        try:
+            rows = (
+                await BallInstance.filter(player_id=player_id)
+                .annotate(count=Count("id"))
+                .group_by("ball_id", "shiny")
+                .values_list("ball_id", "shiny", "count")
+            )
+        finally:
+            self._loading.discard(player_id)
+        progress = PlayerProgress(rows)
+        if player_id in self._stale:
+            # changed while fetching, the result may already be outdated
+            self._stale.discard(player_id)
+            return progress
+        self._entries[player_id] = (time.monotonic(), progress)
+        self._entries.move_to_end(player_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return progress
+
+    def add(self, player_id: int, *balls: tuple[int, bool]):
+        """
+        Record newly obtained balls, as (ball pk, shiny) tuples, for a player.
+        Does nothing if the player isn't cached.
+        """
+        if player_id in self._loading:
+            # the fetch may or may not include them
+            self._stale.add(player_id)
+        entry = self._entries.get(player_id)
+        if entry is not None:
+            for ball_id, shiny in balls:
+                entry[1].add(ball_id, shiny)
+
+    def remove(self, player_id: int, *balls: tuple[int, bool]):
+        """
+        Record balls, as (ball pk, shiny) tuples, leaving a player's inventory.
+        """
+        if player_id in self._loading:
+            # the fetch may or may not include them
+            self._stale.add(player_id)
+        entry = self._entries.get(player_id)
+        if entry is not None:
+            for ball_id, shiny in balls:
+                entry[1].remove(ball_id, shiny)
+
+    def invalidate(self, player_id: int):
+        """
+        Drop a player's entry. Use this when balls change in ways the counters can't
+        follow (trades, edits).
+        """
+        self._entries.pop(player_id, None)
+        if player_id in self._loading:
+            self._stale.add(player_id)
+
+    def clear(self):
+        self._entries.clear()
+        self._stale.update(self._loading)
+
+    def memory_usage(self, player_id: int) -> int:
+        """
+        Size in bytes of a cached player's counters, 0 if not cached.
+        """
+        entry = self._entries.get(player_id)
+        return entry[1].memory_usage() if entry is not None else 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory": sum(progress.memory_usage() for _, progress in self._entries.values()),
+        }
+
+
+owned_balls = OwnedBallsCache()
+metrics.owned_balls_cache_size.set_function(lambda: len(owned_balls))
+metrics.owned_balls_cache_hits.set_function(lambda: owned_balls.hits)
+metrics.owned_balls_cache_misses.set_function(lambda: owned_balls.misses)
+metrics.owned_balls_cache_memory.set_function(lambda: owned_balls.stats()["memory"])
+
+
+async def get_missing_requirements(player_id: int | None, achievement: Achievement) -> list[str]:
+    """
+    Return the required ball names the player doesn't own yet.
+    """
+    progress = await owned_balls.get(player_id) if player_id is not None else PlayerProgress()
+    return achievement.compiled.missing(progress)
+
+
+def achieved_memo(interaction: discord.Interaction) -> dict[int, set[int]]:
+    """
+    Request-scoped memo for `get_achieved`, stored on the interaction.
+    """
+    return interaction.extras.setdefault("achieved", {})
+
+
+async def get_achieved(discord_id: int, memo: dict[int, set[int]] | None = None) -> set[int]:
+    """
+    Return the pks of every achievement held by this player, in a single query.
+
+    Parameters
+    ----------
+    discord_id: int
+        Discord ID of the player.
+    memo: dict[int, set[int]] | None
+        Optional memo (see `achieved_memo`) so the query runs once per interaction. Callers
+        awarding achievements must add the new pks to the returned set.
+    """
+    if memo is not None and discord_id in memo:
+        return memo[discord_id]
+    achieved = set(
+        await AchievementInstance.filter(player__discord_id=discord_id).values_list(
+            "achievement_id", flat=True
+        )
+    )
+    if memo is not None:
+        memo[discord_id] = achieved
+    return achieved
+
+
+async def has_achievement(discord_id: int, achievement_id: int) -> bool:
+    """
+    Check if a player holds a single achievement.
+    """
+    return await AchievementInstance.filter(
+        player__discord_id=discord_id, achievement_id=achievement_id
+    ).exists()
+
+
+async def grant_achievement(
+    player: Player, achievement: Achievement, server_id: int | None = None
+) -> bool:
+    """
+    Give an achievement and all of its reward balls to a player.
+
+    Everything is written in a single transaction, so a failure never leaves the rewards
+    half-granted. Returns False if the player already had it, nothing is given then.
+
+    Parameters
+    ----------
+    player: Player
+        The player receiving the achievement.
+    achievement: Achievement
+        The achievement to give.
+    server_id: int | None
+        ID of the guild where the achievement was obtained, if any.
+    """
+    return bool(await grant_achievements([(player, achievement)], server_id))
+
+
+INSERT_ACHIEVEMENTS_QUERY = """
+INSERT INTO "achievementinstance" ("player_id", "achievement_id", "server_id")
+SELECT * FROM unnest($1::int[], $2::int[], $3::bigint[])
+ON CONFLICT ("player_id", "achievement_id") DO NOTHING
+RETURNING "player_id", "achievement_id"
+"""
+
+
+async def grant_achievements(
+    grants: list[tuple[Player, Achievement]], server_id: int | None = None
+) -> list[tuple[Player, Achievement]]:
+    """
+    Bulk version of `grant_achievement`, all the achievements and rewards are inserted in
+    a single transaction.
+
+    Achievements already held are skipped (`ON CONFLICT DO NOTHING`) along with their
+    rewards, so concurrent grants from several processes are safe. Returns the grants
+    that were actually made.
+    """
+    if not grants:
+        return []
+    async with in_transaction() as connection:
+        grants, instances = await insert_grants(connection, grants, server_id)
+    record_grants(grants, instances, server_id)
+    return grants
+
+
+async def insert_grants(
+    connection: "BaseDBAsyncClient",
+    grants: list[tuple[Player, Achievement]],
+    server_id: int | None,
+) -> tuple[list[tuple[Player, Achievement]], list[BallInstance]]:
+    """
+    Insert achievements and their reward balls on a connection in a transaction, skipping
+    the achievements already held. Returns the grants made and the reward balls created,
+    to pass to `record_grants` once committed.
+    """
+    rows = await connection.execute_query_dict(
+        INSERT_ACHIEVEMENTS_QUERY,
+        [
+            [player.pk for player, _ in grants],
+            [achievement.pk for _, achievement in grants],
+            [server_id] * len(grants),
+        ],
+    )
+    inserted = {(row["player_id"], row["achievement_id"]) for row in rows}
+    grants = [(p, a) for p, a in grants if (p.pk, a.pk) in inserted]
+    instances = [
+        BallInstance(ball=balls[ball_id], player=player, shiny=shiny)
+        for player, achievement in grants
+        for ball_id, shiny, count in achievement.compiled.rewards
+        for _ in range(count)
+    ]
+    if instances:
+        await BallInstance.bulk_create(instances, using_db=connection)
+    return grants, instances
+
+
+def record_grants(
+    grants: list[tuple[Player, Achievement]], instances: list[BallInstance], server_id: int | None
+):
+    # bulk_create doesn't trigger the post_save signals
+    for instance in instances:
+        owned_balls.add(instance.player_id, (instance.ball_id, instance.shiny))
+    for player, achievement in grants:
+        achievement_stats.record(player.discord_id, achievement.pk, server_id)
+        metrics.achievements_awarded.labels(achievement=achievement.name).inc()
+    metrics.reward_balls_minted.inc(len(instances))
+
+
+COMPLETED_ACHIEVEMENTS_QUERY = """
+WITH "requirement" AS (
+    SELECT "achievementrequirement".*,
+        COALESCE("achievement"."start_date", '-infinity') AS "start_date",
+        COALESCE("achievement"."end_date", 'infinity') AS "end_date"
+    FROM "achievementrequirement"
+    JOIN "achievement" ON "achievement"."id" = "achievementrequirement"."achievement_id"
+    WHERE $2::int[] IS NULL OR "achievement_id" = ANY($2::int[])
+), "required" AS (
+    SELECT "achievement_id", COUNT(DISTINCT "clause") AS "count"
+    FROM "requirement"
+    GROUP BY "achievement_id"
+), "owned_ball" AS (
+    SELECT "ballinstance"."player_id", "requirement"."achievement_id", "requirement"."clause",
+        "requirement"."needed"
+    FROM "requirement"
+    JOIN "ballinstance" ON "ballinstance"."ball_id" = "requirement"."ball_id"
+        AND ("ballinstance"."shiny" OR NOT "requirement"."shiny")
+        AND ("requirement"."special_id" IS NULL
+            OR "ballinstance"."special_id" = "requirement"."special_id")
+        -- a range on the catch date index
+        AND (NOT "requirement"."windowed" OR (
+            "ballinstance"."catch_date" >= "requirement"."start_date"
+            AND "ballinstance"."catch_date" < "requirement"."end_date"))
+    WHERE "ballinstance"."player_id" = ANY($1::int[])
+    GROUP BY "ballinstance"."player_id", "requirement"."achievement_id", "requirement"."clause",
+        "requirement"."needed", "requirement"."ball_id", "requirement"."quantity"
+    HAVING COUNT(*) >= "requirement"."quantity"
+), "fulfilled" AS (
+    SELECT "player_id", "achievement_id", "clause"
+    FROM "owned_ball"
+    GROUP BY "player_id", "achievement_id", "clause", "needed"
+    HAVING COUNT(*) >= "needed"
+)
+SELECT "fulfilled"."player_id", "fulfilled"."achievement_id", "required"."count" AS "clauses"
+FROM "fulfilled"
+JOIN "required" ON "required"."achievement_id" = "fulfilled"."achievement_id"
+WHERE NOT EXISTS (
+    SELECT 1 FROM "achievementinstance"
+    WHERE "achievementinstance"."player_id" = "fulfilled"."player_id"
+    AND "achievementinstance"."achievement_id" = "fulfilled"."achievement_id"
+)
+GROUP BY "fulfilled"."player_id", "fulfilled"."achievement_id", "required"."count"
+HAVING COUNT(*) = "required"."count"
+"""
+
+
+async def get_completed_achievements(
+    player_ids: list[int],
+    achievement_ids: list[int] | None = None,
+    using_db: "BaseDBAsyncClient | None" = None,
+) -> dict[int, set[int]]:
+    """
+    Find the achievements completed but not held yet by these players, in a single query.
+
+    Parameters
+    ----------
+    player_ids: list[int]
+        Primary keys of the players to evaluate.
+    achievement_ids: list[int] | None
+        Restrict the evaluation to these achievements, defaults to every cached achievement.
+    using_db: BaseDBAsyncClient | None
+        Connection to run the query on, a transaction sees its own uncommitted rewards.
+
+    Returns
+    -------
+    dict[int, set[int]]
+        Player pk -> pks of the achievements they can be awarded.
+    """
+    if not player_ids:
+        return {}
+    rows = await (using_db or connections.get("default")).execute_query_dict(
+        COMPLETED_ACHIEVEMENTS_QUERY, [player_ids, achievement_ids]
+    )
+    completed: dict[int, set[int]] = {}
+    for row in rows:
+        achievement = achievements.get(row["achievement_id"])
+        # the table doesn't hold requirements matching no ball, those can't be completed
+        # firstball achievements are given for a catch, not for owning the balls
+        if achievement is None or achievement.compiled.unknown or achievement.firstball:
+            continue
+        # rows synced while a ball was unknown, they miss clauses the cache now knows
+        if row["clauses"] != len(achievement.compiled.clauses):
+            continue
+        completed.setdefault(row["player_id"], set()).add(row["achievement_id"])
+    return completed
+
+
+# serializes the evaluations of a player, keyed by player pk
+player_locks = KeyedLock()
+# concurrent identical evaluations (same player and scope) share a single run
+evaluations = SingleFlight()
+
+
+def chained_candidates(
+    progress: PlayerProgress, granted: Iterable[Achievement], done: set[int]
+) -> list[Achievement]:
+    """
+    Dependents of newly granted achievements worth confirming: not granted yet, in their
+    window, and completed according to the counters with the rewards added (`progress` is
+    updated with them). Sorted by `achievement_rank`, so rewards come before what they fulfill.
+    """
+    pks: set[int] = set()
+    for achievement in granted:
+        for ball_id, shiny, count in achievement.compiled.rewards:
+            progress.add(ball_id, shiny, count)
+        pks.update(achievement_dependents.get(achievement.pk, ()))
+    inactive = achievement_schedule.inactive()
+    candidates = [
+        achievements[pk]
+        for pk in pks - done - inactive
+        if pk in achievements
+        and not achievements[pk].firstball
+        and not achievements[pk].compiled.empty
+        and achievements[pk].compiled.completed(progress)
+    ]
+    return sorted(candidates, key=lambda a: achievement_rank.get(a.pk, 0))
+
+
+async def award_achievements(
+    player: Player, candidates: Iterable[Achievement], server_id: int | None = None
+) -> list[Achievement]:
+    """
+    Grant every candidate achievement the player completed but doesn't hold yet, and every
+    achievement their rewards complete in turn.
+    Returns the newly awarded achievements.
+
+    Candidates outside their window (see `AchievementSchedule`) are skipped, the progress
+    counters of the owned balls cache filter out the incomplete ones, the remaining ones are
+    confirmed with `get_completed_achievements`. The whole chain is granted in a single
+    transaction, one level at a time: the dependents of a level are confirmed by the same
+    query on the transaction, which sees the rewards just inserted, so stale counters can't
+    grant anything. Only one evaluation per player runs at a time, so concurrent calls can't
+    grant the same achievement twice.
+    """
+    inactive = achievement_schedule.inactive()
+    candidates = [a for a in candidates if a.pk not in inactive]
+    if not candidates:
+        return []
+    progress = await owned_balls.get(player.pk)
+    candidates = [
+        a
+        for a in candidates
+        if not a.firstball and not a.compiled.empty and a.compiled.completed(progress)
+    ]
+    if not candidates:
+        return []
+
+    async with player_locks(player.pk):
+        progress = (await owned_balls.get(player.pk)).copy()
+        granted: list[tuple[Player, Achievement]] = []
+        instances: list[BallInstance] = []
+        done: set[int] = set()
+        async with in_transaction() as connection:
+            while candidates:
+                completed = await get_completed_achievements(
+                    [player.pk], [a.pk for a in candidates], connection
+                )
+                level = [a for a in candidates if a.pk in completed.get(player.pk, ())]
+                if not level:
+                    break
+                # the incomplete ones are evaluated again if a later reward affects them
+                done.update(a.pk for a in level)
+                level_grants, level_instances = await insert_grants(
+                    connection, [(player, a) for a in level], server_id
+                )
+                granted.extend(level_grants)
+                instances.extend(level_instances)
+                candidates = chained_candidates(progress, [a for _, a in level_grants], done)
+        record_grants(granted, instances, server_id)
+    return [a for _, a in granted]
@@ -0,0 +1,74 @@
+import unicodedata
+
+from ballsdex.core.models import Ball, balls
+
+# Latin, Greek and Cyrillic letters, the only ones whose marks are accents that can be dropped
+# (kana voicing marks or the Devanagari nukta make a different letter)
+ACCENTED_RANGES = ((0x41, 0x24F), (0x370, 0x52F), (0x1E00, 0x1FFF))
+
+
+def foldable(char: str) -> bool:
+    return any(start <= ord(char) <= end for start, end in ACCENTED_RANGES)
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a ball name or a guess for comparison: NFKC, casefolded, accents of Latin,
+    Greek and Cyrillic letters removed and whitespace collapsed.
+    """
+    kept = []
+    base = ""
+    for char in unicodedata.normalize("NFKD", text.casefold()):
+        if not unicodedata.combining(char):
+            base = char
+        elif foldable(base):
+            continue
+        kept.append(char)
+    return " ".join(unicodedata.normalize("NFKC", "".join(kept)).split())
+
+
+def accepted_names(ball: Ball) -> frozenset[str]:
+    """
+    Normalized forms of every name that catches this ball: its name, catch names
+    and translations.
+    """
+    names = [ball.country]
+    for field in (ball.catch_names, ball.translations):
+        if field:
+            names.extend(field.split(";"))
+    return frozenset(x for x in map(normalize_name, names) if x)
+
+
+class CatchNameIndex:
+    """
+    Accepted catch names of each ball, keyed by ball pk, computed when the balls cache is
+    loaded and refreshed when a ball is saved. Checking a guess is a set lookup.
+    """
+
+    def __init__(self):
+        self._names: dict[int, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def rebuild(self):
+        self._names = {pk: accepted_names(ball) for pk, ball in balls.items()}
+
+    def refresh(self, ball: Ball):
+        self._names[ball.pk] = accepted_names(ball)
+
+    def remove(self, ball_id: int):
+        self._names.pop(ball_id, None)
+
+    def matches(self, ball: Ball, guess: str) -> bool:
+        """
+        Check if the guess is one of the accepted names of this ball.
+        """
+        names = self._names.get(ball.pk)
+        if names is None:
+            # not in the balls cache (disabled or added after loading)
+            names = self._names[ball.pk] = accepted_names(ball)
+        return normalize_name(guess) in names
+
+
+catch_names = CatchNameIndex()
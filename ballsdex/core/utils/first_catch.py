@@ -0,0 +1,166 @@
+import logging
+from collections import OrderedDict
+
+from tortoise import connections
+
+from ballsdex.core import models
+from ballsdex.core.models import (
+    Achievement,
+    FirstBallScope,
+    FirstCatch,
+    Player,
+    achievement_dependents,
+    achievement_schedule,
+    achievements,
+    firstball_by_ball,
+)
+from ballsdex.core.utils.achievements import award_achievements, grant_achievements
+from ballsdex.core.utils.singleflight import SingleFlight
+
+log = logging.getLogger("ballsdex.core.utils.first_catch")
+
+CLAIM_QUERY = """
+INSERT INTO "firstcatch" ("ball_id", "server_id", "player_id")
+SELECT $1, unnest($2::bigint[]), $3
+ON CONFLICT ("ball_id", "server_id") DO NOTHING
+RETURNING "server_id"
+"""
+
+# first catch of each ball in each server, from the existing instances
+SERVER_HISTORY_QUERY = """
+INSERT INTO "firstcatch" ("ball_id", "server_id", "player_id", "caught_at")
+SELECT DISTINCT ON ("ball_id", "server_id") "ball_id", "server_id", "player_id", "catch_date"
+FROM "ballinstance"
+WHERE "server_id" IS NOT NULL
+ORDER BY "ball_id", "server_id", "catch_date", "id"
+ON CONFLICT DO NOTHING
+"""
+
+
+async def seed_server_first_catches() -> int:
+    """
+    Record the first catch of each ball in each server from the existing ball instances,
+    skipping the ones already recorded. Scans the whole `ballinstance` table, it's run by
+    hand (`achievementadmin seedfirstcatches`) before adding the first server-scoped
+    firstball achievement. Returns the number of rows added.
+    """
+    connection = connections.get("default")
+    rows = await connection.execute_query_dict(SERVER_HISTORY_QUERY + ' RETURNING "id"')
+    # the loaded servers miss the seeded balls
+    first_catches.forget_servers()
+    return len(rows)
+
+
+class FirstCatchTracker:
+    """
+    Tracks which balls were already caught, so the database is only hit when a catch might
+    be a first, the unique constraint then deciding between racing catches.
+
+    The balls caught at least once on the bot are all kept in memory, loaded at startup.
+    The balls caught in a server are loaded with one query the first time a catch there
+    needs them, and kept for the `maxsize` most recently active servers. They're only
+    needed while a server-scoped firstball achievement exists.
+    """
+
+    def __init__(self, maxsize: int = 5_000):
+        self.maxsize = maxsize
+        self._caught: set[int] = set()
+        # server ID -> balls already caught there
+        self._servers: OrderedDict[int, set[int]] = OrderedDict()
+        self.loaded = False
+        self._loads = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._caught) + sum(len(x) for x in self._servers.values())
+
+    async def load(self):
+        await self._loads.run("load", self._load)
+
+    async def _load(self):
+        self._caught = set(
+            await FirstCatch.filter(server_id=0).values_list("ball_id", flat=True)
+        )
+        self.loaded = True
+
+    async def server_caught(self, server_id: int) -> set[int]:
+        """
+        The balls already caught in this server, fetched on a miss.
+        """
+        caught = self._servers.get(server_id)
+        if caught is not None:
+            self._servers.move_to_end(server_id)
+            return caught
+        return await self._loads.run(server_id, self._load_server, server_id)
+
+    async def _load_server(self, server_id: int) -> set[int]:
+        caught = set(
+            await FirstCatch.filter(server_id=server_id).values_list("ball_id", flat=True)
+        )
+        self._servers[server_id] = caught
+        while len(self._servers) > self.maxsize:
+            self._servers.popitem(last=False)
+        return caught
+
+    def forget_servers(self):
+        self._servers.clear()
+
+    def achievements_for(self, ball_id: int) -> list[Achievement]:
+        pks = firstball_by_ball.get(ball_id, set()) | firstball_by_ball.get(None, set())
+        return [achievements[pk] for pk in pks if pk in achievements]
+
+    async def claim(self, player: Player, ball_id: int, server_id: int | None) -> set[int]:
+        """
+        Record the catch of a ball, return the scopes where it was the first catch: 0 for
+        the whole bot and/or the server ID.
+        """
+        if not self.loaded:
+            await self.load()
+        scopes = [0] if ball_id not in self._caught else []
+        server_caught: set[int] | None = None
+        if server_id and models.firstball_server_scope:
+            server_caught = await self.server_caught(server_id)
+            if ball_id not in server_caught:
+                scopes.append(server_id)
+        if not scopes:
+            return set()
+        rows = await connections.get("default").execute_query_dict(
+            CLAIM_QUERY, [ball_id, scopes, player.pk]
+        )
+        # claimed by this catch or by a concurrent one, either way it's not a first anymore
+        if 0 in scopes:
+            self._caught.add(ball_id)
+        if server_caught is not None:
+            server_caught.add(ball_id)
+        return {row["server_id"] for row in rows}
+
+
+first_catches = FirstCatchTracker()
+
+
+async def award_first_catch(
+    player: Player, ball_id: int, server_id: int | None
+) -> list[Achievement]:
+    """
+    Grant the firstball achievements of a catch, and the achievements their rewards
+    complete. Returns the newly awarded achievements.
+    """
+    # claimed even without candidates, an achievement added later must not reward a second catch
+    won = await first_catches.claim(player, ball_id, server_id)
+    if not won:
+        return []
+    inactive = achievement_schedule.inactive()
+    candidates = [a for a in first_catches.achievements_for(ball_id) if a.pk not in inactive]
+    eligible = [
+        a
+        for a in candidates
+        if a.achievable
+        and not a.compiled.unknown
+        and (0 if a.firstball_scope == FirstBallScope.GLOBAL else server_id) in won
+    ]
+    granted = [a for _, a in await grant_achievements([(player, a) for a in eligible], server_id)]
+    dependents = {pk for a in granted for pk in achievement_dependents.get(a.pk, ())}
+    if dependents:
+        granted += await award_achievements(
+            player, [achievements[pk] for pk in dependents if pk in achievements], server_id
+        )
+    return granted
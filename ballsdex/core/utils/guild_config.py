@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+
+from tortoise.exceptions import DoesNotExist, IntegrityError
+
+from ballsdex.core.models import GuildConfig
+from ballsdex.core.utils.singleflight import SingleFlight
+
+
+class GuildConfigCache:
+    """
+    Bounded LRU cache of guild configs, keyed by guild ID.
+
+    Saving or deleting a `GuildConfig` invalidates its entry through the model signals,
+    entries also expire after `ttl` seconds for changes that bypass them (queryset updates,
+    other processes). Concurrent misses for the same guild share one fetch, so a missing
+    config is only created once.
+    """
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, GuildConfig]] = OrderedDict()
+        self._loads = SingleFlight()
+        # guilds invalidated while their config is being fetched
+        self._stale: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, guild_id: int) -> GuildConfig:
+        """
+        Return the config of this guild, creating it if it doesn't exist yet.
+        """
+        entry = self._entries.get(guild_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(guild_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return await self._loads.run(guild_id, self._load, guild_id)
+
+    async def _load(self, guild_id: int) -> GuildConfig:
+        self._stale.discard(guild_id)
+        try:
+            config = await GuildConfig.get(guild_id=guild_id)
+        except DoesNotExist:
+            try:
+                config = await GuildConfig.create(guild_id=guild_id, spawn_channel=None)
+            except IntegrityError:
+                # created by another process in the meantime
+                config = await GuildConfig.get(guild_id=guild_id)
+        if guild_id in self._stale:
+            self._stale.discard(guild_id)
+            return config
+        self._entries[guild_id] = (time.monotonic(), config)
+        self._entries.move_to_end(guild_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return config
+
+    def invalidate(self, guild_id: int):
+        """
+        Drop a guild's entry, the next `get` fetches it again.
+        """
+        self._entries.pop(guild_id, None)
+        if guild_id in self._loads:
+            self._stale.add(guild_id)
+
+    def clear(self):
+        self._entries.clear()
+
+
+guild_configs = GuildConfigCache()
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from tortoise import connections
+
+if TYPE_CHECKING:
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+log = logging.getLogger("ballsdex.core.utils.invalidation")
+
+# identifies the events published by this process, they're already applied locally
+ORIGIN = uuid.uuid4().hex
+
+
+@dataclass
+class InvalidationEvent:
+    """
+    A cached row changed. `pk` is None when a whole topic must be reloaded (missed events).
+
+    `version` is the publication time in nanoseconds, receivers ignore an event older than
+    the last one applied for the same row and publisher (duplicates, reordering after a
+    reconnect). Handlers should refetch the row rather than trust `action`, so applying
+    events from different publishers in any order ends in the current state.
+    """
+
+    topic: str
+    pk: int | None
+    action: str = "save"
+    version: int = 0
+    origin: str = ORIGIN
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def loads(cls, data: str | bytes) -> "InvalidationEvent":
+        return cls(**json.loads(data))
+
+
+Handler = Callable[[InvalidationEvent], Awaitable[None]]
+
+
+class InvalidationBus:
+    """
+    Broadcasts cache invalidation events between the processes sharing the database
+    (bot clusters, admin panel). Backends implement `_send`, and call `_receive` with every
+    event they get, including the ones sent by this process.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = {}
+        self._versions: dict[tuple[str, str, int | None], int] = {}
+        # pending deliveries, referenced so they aren't garbage collected mid-reload
+        self._tasks: set[asyncio.Task] = set()
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, topic: str, handler: Handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler):
+        handlers = self._handlers.get(topic, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(
+        self,
+        topic: str,
+        pk: int | None,
+        action: str = "save",
+        using_db: "BaseDBAsyncClient | None" = None,
+    ):
+        """
+        Publish a change of a row. Pass the connection of the change if it's part of a
+        transaction, backends supporting it only deliver the event once it's committed.
+        """
+        event = InvalidationEvent(topic, pk, action, time.time_ns())
+        self.published += 1
+        try:
+            await self._send(event, using_db)
+        except Exception:
+            log.exception(f"Failed to publish invalidation of {topic} {pk}")
+
+    async def _send(self, event: InvalidationEvent, using_db: "BaseDBAsyncClient | None"):
+        raise NotImplementedError
+
+    def _spawn_receive(self, event: InvalidationEvent):
+        """
+        Deliver an event from a synchronous callback of the backend.
+        """
+        task = asyncio.create_task(self._receive(event))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_received)
+
+    def _on_received(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Failed to receive an invalidation event", exc_info=task.exception())
+
+    async def _receive(self, event: InvalidationEvent):
+        if event.origin == ORIGIN:
+            return
+        key = (event.origin, event.topic, event.pk)
+        if event.version < self._versions.get(key, 0):
+            return
+        self._versions[key] = event.version
+        self.received += 1
+        await self._dispatch(event)
+
+    async def _dispatch(self, event: InvalidationEvent):
+        for handler in list(self._handlers.get(event.topic, ())):
+            try:
+                await handler(event)
+            except Exception:
+                log.exception(f"Failed to apply invalidation of {event.topic} {event.pk}")
+
+    async def _reset(self):
+        """
+        Events may have been missed, ask every subscriber to reload its whole topic.
+        """
+        for topic in list(self._handlers):
+            await self._dispatch(InvalidationEvent(topic, None, "reset", time.time_ns()))
+
+
+class LocalBus(InvalidationBus):
+    """
+    Delivers events within this process only, for single-process deployments.
+    Events published by this process are skipped, so nothing is ever delivered.
+    """
+
+    async def _send(self, event: InvalidationEvent, using_db: "BaseDBAsyncClient | None"):
+        await self._receive(event)
+
+
+class PostgresBus(InvalidationBus):
+    """
+    Broadcasts events with PostgreSQL `NOTIFY`. Publishing goes through the Tortoise
+    connection, listening needs a dedicated connection, reopened if it's lost.
+    """
+
+    channel = "ballsdex_invalidation"
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._connection = None
+        self._reconnect: asyncio.Task | None = None
+        self._closing = False
+
+    async def start(self):
+        import asyncpg
+
+        self._closing = False
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(self.channel, self._on_notify)
+        self._connection.add_termination_listener(self._on_terminated)
+
+    async def stop(self):
+        self._closing = True
+        if self._reconnect and self._reconnect is not asyncio.current_task():
+            self._reconnect.cancel()
+        if self._connection and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def _send(self, event: InvalidationEvent, using_db: "BaseDBAsyncClient | None"):
+        # notifications sent in a transaction are delivered when it commits
+        await (using_db or connections.get("default")).execute_query(
+            "SELECT pg_notify($1, $2)", [self.channel, event.dumps()]
+        )
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        self._spawn_receive(InvalidationEvent.loads(payload))
+
+    def _on_terminated(self, connection):
+        if not self._closing:
+            log.warning("Lost the invalidation listener connection, reconnecting")
+            self._reconnect = asyncio.create_task(self._restart())
+
+    async def _restart(self):
+        delay = 1
+        while not self._closing:
+            try:
+                await self.start()
+            except Exception:
+                log.exception("Failed to reconnect the invalidation listener")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+            else:
+                await self._reset()
+                return
+
+
+class SocketBus(InvalidationBus):
+    """
+    Broadcasts events with Unix datagram sockets: every process binds a socket in
+    `directory` and sends events to all the others. Meant for tests and single-host setups.
+    """
+
+    def __init__(self, directory: str | Path):
+        super().__init__()
+        self.directory = Path(directory)
+        self.path = self.directory / f"{ORIGIN}.sock"
+        self._transport: asyncio.DatagramTransport | None = None
+
+    async def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        bus = self
+
+        class Protocol(asyncio.DatagramProtocol):
+            def datagram_received(self, data: bytes, addr):
+                bus._spawn_receive(InvalidationEvent.loads(data))
+
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            Protocol, local_addr=str(self.path), family=socket.AF_UNIX
+        )
+
+    async def stop(self):
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        self.path.unlink(missing_ok=True)
+
+    async def _send(self, event: InvalidationEvent, using_db: "BaseDBAsyncClient | None"):
+        data = event.dumps().encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            for path in self.directory.glob("*.sock"):
+                if path == self.path:
+                    continue
+                try:
+                    sock.sendto(data, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # process gone without cleaning up
+                    path.unlink(missing_ok=True)
+
+
+def create_bus() -> InvalidationBus:
+    """
+    Build the bus configured by `BALLSDEXBOT_INVALIDATION_BUS`: "postgres" (default, using
+    `BALLSDEXBOT_DB_URL`), "local", or "socket:<directory>".
+    """
+    backend = os.environ.get("BALLSDEXBOT_INVALIDATION_BUS", "postgres")
+    if backend == "local":
+        return LocalBus()
+    if backend.startswith("socket:"):
+        return SocketBus(backend.removeprefix("socket:"))
+    if backend == "postgres":
+        dsn = os.environ.get("BALLSDEXBOT_DB_URL")
+        if dsn:
+            return PostgresBus(dsn)
+        log.warning("BALLSDEXBOT_DB_URL is not set, cache invalidation stays local")
+        return LocalBus()
+    raise ValueError(f"Unknown invalidation bus {backend!r}")
+
+
+invalidation_bus = create_bus()
@@ -14,3 +14,61 @@
         return self.embed
 
 # FIND YOUR "FieldPageSource" CLASS AND REPLACE THE format_page FUNCTION WITH THIS
+
+
+# ADD THIS CLASS UNDER YOUR "FieldPageSource" CLASS
+# (it also needs "import asyncio", "import time", "from collections import OrderedDict"
+# and "from typing import Awaitable, Callable, Hashable" in your imports)
+
+class LazyFieldPageSource(FieldPageSource):
+    """
+    A `FieldPageSource` whose fields are only rendered when their page is shown.
+
+    Entries are keys passed to `render`, which returns the (field_name, field_value) tuple.
+    The next page is rendered in the background while the current one is displayed, and
+    rendered pages are kept for `ttl` seconds, keyed by `memo_key` and the page number.
+    `memo_key` must change whenever the rendered content would (player, catalogue version...).
+    """
+
+    _rendered: OrderedDict[tuple[Hashable, int], tuple[float, list[tuple[Any, Any]]]] = OrderedDict()
+    max_rendered = 1000
+    ttl = 300
+
+    def __init__(
+        self,
+        entries: list[Any],
+        render: Callable[[Any], Awaitable[tuple[Any, Any]]],
+        *,
+        memo_key: Hashable = None,
+        **kwargs: Any,
+    ):
+        super().__init__(entries, **kwargs)
+        self.render = render
+        self.memo_key = memo_key
+        self._prefetch: asyncio.Task | None = None
+
+    async def get_page(self, page_number: int) -> int:
+        return page_number
+
+    async def render_page(self, page_number: int) -> list[tuple[Any, Any]]:
+        key = (self.memo_key, page_number)
+        if self.memo_key is not None:
+            cached = self._rendered.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+        base = page_number * self.per_page
+        fields = [await self.render(x) for x in self.entries[base : base + self.per_page]]
+        if self.memo_key is not None:
+            self._rendered[key] = (time.monotonic(), fields)
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self.max_rendered:
+                self._rendered.popitem(last=False)
+        return fields
+
+    async def format_page(self, menu: Pages, page_number: int) -> discord.Embed:
+        if self._prefetch is not None and not self._prefetch.done():
+            await self._prefetch
+        fields = await self.render_page(page_number)
+        if page_number + 1 < self.get_max_pages():
+            self._prefetch = asyncio.create_task(self.render_page(page_number + 1))
+        return await super().format_page(menu, fields)
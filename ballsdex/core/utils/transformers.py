@@ -2,6 +2,7 @@ from ballsdex.core.models import (
     Achievement,
     achievements, # add these to your existing imports
 )
+from ballsdex.core.utils.achievement_search import achievement_index # add this import too
 __all__ = (
     "AchievementTransform",
     "AchievementAchievableTransformer",
@@ -10,16 +11,34 @@ __all__ = (
 class AchievementTransformer(TTLModelTransformer[Achievement]):
     name = "achievement"
     model = Achievement()
+    achievable_only = False
 
     def key(self, model: Achievement) -> str:
         return model.name
 
     async def load_items(self) -> Iterable[Achievement]:
         return achievements.values()
+
+    async def get_from_pk(self, value: int) -> Achievement:
+        # the autocomplete doesn't load self.items, read the live cache instead
+        try:
+            return achievements[int(value)]
+        except KeyError:
+            raise DoesNotExist
+
+    async def get_options(
+        self, interaction: discord.Interaction["BallsDexBot"], value: str
+    ) -> list[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=achievement.name, value=str(achievement.pk))
+            for achievement in achievement_index.search(value, achievable_only=self.achievable_only)
+        ]
     
 class AchievementAchievableTransformer(AchievementTransformer):
+    achievable_only = True
+
     async def load_items(self) -> Iterable[Achievement]:
-        return {k: v for k, v in achievements.items() if v.achievable}.values()
+        return (x for x in achievements.values() if x.achievable)
 
     async def transform(
         self, interaction: discord.Interaction["BallsDexBot"], value: str
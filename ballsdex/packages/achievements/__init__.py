@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+from ballsdex.packages.achievements.admin import AchievementsAdmin
 from ballsdex.packages.achievements.cog import Achievements
 
 if TYPE_CHECKING:
@@ -8,3 +9,4 @@ if TYPE_CHECKING:
 
 async def setup(bot: "BallsDexBot"):
     await bot.add_cog(Achievements(bot))
+    await bot.add_cog(AchievementsAdmin(bot))
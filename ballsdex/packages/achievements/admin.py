@@ -0,0 +1,145 @@
+import io
+import logging
+import tempfile
+from typing import TYPE_CHECKING
+
+import discord
+from discord.ext import commands
+
+from ballsdex.core.models import achievements
+from ballsdex.core.utils.first_catch import seed_server_first_catches
+from ballsdex.packages.achievements.backfill import backfill
+from ballsdex.packages.achievements.catalogue import (
+    FORMATS,
+    export_achievements,
+    import_achievements,
+)
+
+if TYPE_CHECKING:
+    from ballsdex.core.bot import BallsDexBot
+
+log = logging.getLogger("ballsdex.packages.achievements.admin")
+
+
+class AchievementsAdmin(commands.Cog):
+    """
+    Owner commands to manage the achievement catalogue.
+    """
+
+    def __init__(self, bot: "BallsDexBot"):
+        self.bot = bot
+
+    @commands.group(name="achievementadmin", invoke_without_command=True)
+    @commands.is_owner()
+    async def achievementadmin(self, ctx: commands.Context):
+        await ctx.send_help(ctx.command)
+
+    @achievementadmin.command(name="backfill")
+    @commands.is_owner()
+    async def backfill(self, ctx: commands.Context, *names: str):
+        """
+        Grant achievements to every existing player that already completed them.
+
+        Pass `--dry-run` to only report how many players qualify and how many reward balls
+        would be minted. An interrupted backfill resumes when run again with the same names.
+        """
+        dry_run = "--dry-run" in names
+        names = tuple(x for x in names if x != "--dry-run")
+        by_name = {a.name.lower(): a for a in achievements.values()}
+        targets = [by_name[x.lower()] for x in names if x.lower() in by_name]
+        unknown = [x for x in names if x.lower() not in by_name]
+        if unknown or not targets:
+            await ctx.send(f"Unknown achievements: {', '.join(unknown) or 'none given'}")
+            return
+
+        await ctx.send(f"{'Estimating' if dry_run else 'Running'} the backfill...")
+        worker = getattr(self.bot.get_cog("Achievements"), "worker", None)
+        async with ctx.typing():
+            report = await backfill(targets, dry_run=dry_run, worker=worker)
+
+        if dry_run:
+            text = (
+                f"{report.qualified} of {report.players} players would get "
+                f"{report.granted} achievements and {report.reward_balls} reward balls."
+            )
+        else:
+            text = (
+                f"Granted {report.granted} achievements and {report.reward_balls} reward balls "
+                f"to {report.qualified} players."
+            )
+            if report.resumed_from:
+                text += f" Resumed after player #{report.resumed_from}."
+        await ctx.send(text)
+
+    @achievementadmin.command(name="seedfirstcatches")
+    @commands.is_owner()
+    async def seedfirstcatches(self, ctx: commands.Context):
+        """
+        Record the first catch of each ball in each server from the existing catches.
+
+        Run it before adding the first server-scoped firstball achievement, catches made
+        while none existed are otherwise not known as a server's first. Scans every ball
+        instance, already recorded first catches are kept.
+        """
+        async with ctx.typing():
+            added = await seed_server_first_catches()
+        await ctx.send(f"Recorded {added} server first catches.")
+
+    @achievementadmin.command(name="import")
+    @commands.is_owner()
+    async def import_(self, ctx: commands.Context, *flags: str):
+        """
+        Create or update achievements from an attached JSON Lines or CSV file.
+
+        Columns are name, requirements, simplified_req, rewards, achievable, firstball,
+        firstball_scope (global or server), start_date and end_date (ISO 8601, UTC by default).
+        Achievements are matched by name. Every ball name is checked first and nothing is
+        saved if there is any error. Pass `--dry-run` to only validate the file.
+        """
+        if not ctx.message.attachments:
+            await ctx.send("Attach a .jsonl or .csv file to import.")
+            return
+        attachment = ctx.message.attachments[0]
+        format = "csv" if attachment.filename.lower().endswith(".csv") else "json"
+        dry_run = "--dry-run" in flags
+
+        stream = io.TextIOWrapper(
+            io.BytesIO(await attachment.read()), encoding="utf-8-sig", newline=""
+        )
+        async with ctx.typing():
+            report = await import_achievements(stream, format, dry_run=dry_run)
+
+        if report.errors:
+            text = f"{len(report.errors)} errors found, nothing was imported:\n" + "\n".join(
+                report.errors
+            )
+            if len(text) > 2000:
+                await ctx.send(
+                    f"{len(report.errors)} errors found, nothing was imported.",
+                    file=discord.File(io.BytesIO(text.encode()), filename="errors.txt"),
+                )
+            else:
+                await ctx.send(text)
+            return
+        action = "Would create" if dry_run else "Created"
+        await ctx.send(
+            f"{action} {report.created} and {'update' if dry_run else 'updated'} "
+            f"{report.updated} achievements."
+        )
+
+    @achievementadmin.command(name="export")
+    @commands.is_owner()
+    async def export(self, ctx: commands.Context, format: str = "json"):
+        """
+        Export the achievement catalogue as JSON Lines (default) or CSV.
+        """
+        if format not in FORMATS:
+            await ctx.send(f"Unknown format, use one of {', '.join(FORMATS)}.")
+            return
+        with tempfile.TemporaryFile() as file:
+            async with ctx.typing():
+                async for chunk in export_achievements(format):
+                    file.write(chunk.encode())
+            file.seek(0)
+            extension = "csv" if format == "csv" else "jsonl"
+            await ctx.send(file=discord.File(file, filename=f"achievements.{extension}"))
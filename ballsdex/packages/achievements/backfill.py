@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ballsdex.core.models import Achievement, Player
+from ballsdex.core.utils.achievements import (
+    get_completed_achievements,
+    grant_achievements,
+)
+
+if TYPE_CHECKING:
+    from ballsdex.packages.achievements.worker import AchievementWorker
+
+log = logging.getLogger("ballsdex.packages.achievements.backfill")
+
+CHECKPOINT_PATH = Path("achievement-backfill.json")
+
+
+@dataclass
+class BackfillReport:
+    players: int = 0
+    qualified: int = 0
+    granted: int = 0
+    reward_balls: int = 0
+    resumed_from: int = 0
+
+
+def load_checkpoint(achievement_ids: list[int]) -> int:
+    """
+    Return the last player pk processed by an interrupted backfill of the same achievements.
+    """
+    try:
+        data = json.loads(CHECKPOINT_PATH.read_text())
+    except (OSError, ValueError):
+        return 0
+    if data.get("achievements") != sorted(achievement_ids):
+        return 0
+    return data.get("last_player_id", 0)
+
+
+def save_checkpoint(achievement_ids: list[int], last_player_id: int):
+    CHECKPOINT_PATH.write_text(
+        json.dumps({"achievements": sorted(achievement_ids), "last_player_id": last_player_id})
+    )
+
+
+async def backfill(
+    targets: list[Achievement],
+    *,
+    dry_run: bool = False,
+    chunk_size: int = 500,
+    delay: float = 0.5,
+    worker: "AchievementWorker | None" = None,
+) -> BackfillReport:
+    """
+    Evaluate every player against the given achievements and grant the completed ones.
+
+    Players are streamed by ascending pk in chunks of `chunk_size`, each chunk is evaluated
+    with a single query and granted in a single transaction. Progress is checkpointed after
+    each chunk, so a backfill of the same achievements resumes where it stopped.
+
+    Parameters
+    ----------
+    targets: list[Achievement]
+        The achievements to backfill.
+    dry_run: bool
+        Only count the qualifying players and the reward balls that would be minted.
+    chunk_size: int
+        Number of players evaluated per query.
+    delay: float
+        Seconds to wait between chunks.
+    worker: AchievementWorker | None
+        The catch achievement worker. The backfill pauses while its queue is half full, so
+        it doesn't starve the live catch path.
+    """
+    achievement_ids = [a.pk for a in targets]
+    by_pk = {a.pk: a for a in targets}
+    report = BackfillReport()
+    last_id = 0 if dry_run else load_checkpoint(achievement_ids)
+    report.resumed_from = last_id
+
+    while True:
+        players = await Player.filter(id__gt=last_id).order_by("id").limit(chunk_size)
+        if not players:
+            break
+        last_id = players[-1].pk
+        report.players += len(players)
+
+        completed = await get_completed_achievements([p.pk for p in players], achievement_ids)
+        grants = [
+            (player, by_pk[pk])
+            for player in players
+            for pk in sorted(completed.get(player.pk, ()))
+        ]
+        if not dry_run:
+            # achievements awarded in the meantime are skipped by the insert
+            grants = await grant_achievements(grants)
+        report.qualified += len({player.pk for player, _ in grants})
+        report.granted += len(grants)
+        report.reward_balls += sum(
+            count for _, a in grants for _, _, count in a.compiled.rewards
+        )
+
+        if not dry_run:
+            save_checkpoint(achievement_ids, last_id)
+
+        await asyncio.sleep(delay)
+        while worker is not None and worker.queue.qsize() > worker.queue.maxsize // 2:
+            await asyncio.sleep(delay)
+
+    if not dry_run:
+        CHECKPOINT_PATH.unlink(missing_ok=True)
+    log.info(f"Backfill of {achievement_ids} done ({dry_run=}): {report}")
+    return report
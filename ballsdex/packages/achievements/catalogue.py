@@ -0,0 +1,350 @@
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Any, AsyncIterator, Iterable, Iterator
+
+from tortoise.functions import Lower
+from tortoise.transactions import in_transaction
+
+from ballsdex.core.models import (
+    Achievement,
+    AchievementRequirement,
+    FirstBallScope,
+    achievements,
+    ball_pks_by_country,
+    index_achievement_requirements,
+    parse_requirement,
+    requirement_instances,
+    requirement_rows,
+    special_pks_by_name,
+)
+from ballsdex.core.utils.invalidation import invalidation_bus
+
+log = logging.getLogger("ballsdex.packages.achievements.catalogue")
+
+FIELDS = (
+    "name",
+    "requirements",
+    "simplified_req",
+    "rewards",
+    "achievable",
+    "firstball",
+    "firstball_scope",
+    "start_date",
+    "end_date",
+)
+BOOLEAN_FIELDS = ("achievable", "firstball")
+FORMATS = ("json", "csv")
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def read_records(stream: IO[str], format: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Yield (line number, record) from a JSON Lines or CSV stream, one at a time.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, {"__error__": f"invalid JSON ({e.msg})"}
+            continue
+        yield line_number, record if isinstance(record, dict) else {"__error__": "not an object"}
+
+
+def parse_boolean(value: Any) -> bool | None:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "y"):
+        return True
+    if text in ("0", "false", "no", "n"):
+        return False
+    return None
+
+
+def parse_date(value: Any) -> datetime | None:
+    """
+    Parse an ISO 8601 date, assumed UTC without a timezone. Raises ValueError.
+    """
+    date = datetime.fromisoformat(str(value).strip())
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def clean_record(record: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    """
+    Normalize a record and validate it against the balls cache.
+    Returns the fields to save and the list of errors found.
+
+    Only the fields present in the record are returned, so updating an achievement leaves
+    the other fields untouched and creating one uses the model defaults. Empty booleans and
+    scopes (CSV cells) count as absent, other empty values clear the field.
+    """
+    if "__error__" in record:
+        return {}, [record["__error__"]]
+    errors: list[str] = []
+    # csv gives extra values to the None key
+    unknown_fields = {str(x) for x in record} - set(FIELDS)
+    if unknown_fields:
+        errors.append(f"unknown fields {', '.join(sorted(unknown_fields))}")
+
+    values: dict[str, Any] = {}
+    name = str(record.get("name") or "").strip()
+    if not name:
+        errors.append("missing name")
+    elif len(name) > 48:
+        errors.append(f"name {name!r} is longer than 48 characters")
+    values["name"] = name
+
+    if "simplified_req" in record:
+        simplified = str(record["simplified_req"] or "").strip()
+        if len(simplified) > 48:
+            errors.append("simplified_req is longer than 48 characters")
+        values["simplified_req"] = simplified or None
+
+    if "requirements" in record:
+        requirements = [x.strip() for x in str(record["requirements"] or "").split(";")]
+        requirements = [x for x in requirements if x]
+        for clause in requirements:
+            names, *_, special = parse_requirement(clause)
+            if not names:
+                errors.append(f"empty requirement {clause!r}")
+            errors.extend(
+                f"unknown requirement ball {x!r}" for x in names if x not in ball_pks_by_country
+            )
+            if special and special not in special_pks_by_name:
+                errors.append(f"unknown requirement special {special!r}")
+        values["requirements"] = ";".join(requirements) or None
+
+    if "rewards" in record:
+        rewards = [x.strip() for x in str(record["rewards"] or "").split(";")]
+        rewards = [x for x in rewards if x]
+        for reward in rewards:
+            ball = reward[2:].strip() if reward.startswith("✨ ") else reward
+            if ball not in ball_pks_by_country:
+                errors.append(f"unknown reward ball {ball!r}")
+        values["rewards"] = ";".join(rewards) or None
+
+    for key in BOOLEAN_FIELDS:
+        raw = record.get(key)
+        if raw is None or raw == "":
+            continue
+        value = parse_boolean(raw)
+        if value is None:
+            errors.append(f"{key} must be true or false, not {raw!r}")
+        values[key] = value
+
+    if record.get("firstball_scope"):
+        scope = str(record["firstball_scope"]).strip().upper()
+        if scope not in FirstBallScope.__members__:
+            errors.append(f"firstball_scope must be global or server, not {scope.lower()!r}")
+        else:
+            values["firstball_scope"] = FirstBallScope[scope]
+
+    for key in ("start_date", "end_date"):
+        if key not in record:
+            continue
+        raw = record[key]
+        try:
+            values[key] = parse_date(raw) if raw else None
+        except ValueError:
+            errors.append(f"{key} must be an ISO 8601 date, not {raw!r}")
+    if values.get("start_date") and values.get("end_date"):
+        if values["start_date"] >= values["end_date"]:
+            errors.append("start_date must be before end_date")
+    return values, errors
+
+
+def validate(
+    records: Iterable[tuple[int, dict[str, Any]]]
+) -> tuple[list[tuple[int, dict[str, Any]]], list[str]]:
+    """
+    Clean every record, collecting all the errors of the file in one pass.
+    Returns the (line number, fields) of each record and the errors.
+    """
+    cleaned: list[tuple[int, dict[str, Any]]] = []
+    errors: list[str] = []
+    seen: dict[str, int] = {}
+    for line, record in records:
+        values, record_errors = clean_record(record)
+        name = values.get("name")
+        if name:
+            if name.lower() in seen:
+                record_errors.append(f"duplicate of line {seen[name.lower()]}")
+            seen.setdefault(name.lower(), line)
+        errors.extend(f"line {line}: {error}" for error in record_errors)
+        cleaned.append((line, values))
+    return cleaned, errors
+
+
+async def fetch_existing(
+    names: Iterable[str], *, using_db: Any = None, batch_size: int = 500
+) -> dict[str, Achievement]:
+    """
+    The achievements named like one of these names, ignoring case, keyed by lowercased name.
+    """
+    lowered = sorted({x.lower() for x in names if x})
+    existing: dict[str, Achievement] = {}
+    for start in range(0, len(lowered), batch_size):
+        for achievement in (
+            await Achievement.annotate(lower_name=Lower("name"))
+            .filter(lower_name__in=lowered[start : start + batch_size])
+            .using_db(using_db)
+        ):
+            existing[achievement.name.lower()] = achievement
+    return existing
+
+
+def check_existing(
+    rows: list[tuple[int, dict[str, Any]]], existing: dict[str, Achievement]
+) -> list[str]:
+    """
+    Check the records updating an achievement against its current row: the name must match
+    exactly, and setting only one of the dates must not invert the window.
+    """
+    errors: list[str] = []
+    for line, values in rows:
+        achievement = existing.get(values["name"].lower())
+        if achievement is None:
+            continue
+        if achievement.name != values["name"]:
+            errors.append(
+                f"line {line}: name {values['name']!r} only differs in case from the existing "
+                f"achievement {achievement.name!r}"
+            )
+        # both dates in the record are already checked by clean_record
+        if ("start_date" in values) == ("end_date" in values):
+            continue
+        start = values.get("start_date", achievement.start_date)
+        end = values.get("end_date", achievement.end_date)
+        if start and end and start >= end:
+            other = "end_date" if "start_date" in values else "start_date"
+            errors.append(
+                f"line {line}: start_date must be before end_date, the existing achievement's "
+                f"{other} is {getattr(achievement, other).isoformat()}"
+            )
+    return errors
+
+
+async def import_achievements(
+    stream: IO[str], format: str, *, dry_run: bool = False, batch_size: int = 100
+) -> ImportReport:
+    """
+    Create or update the achievements of a JSON Lines or CSV stream, matched by name.
+
+    Everything is validated first, nothing is written if any row has an error. Names are
+    matched ignoring case, a name only differing in case from the existing one is an error.
+    Rows are then upserted in one transaction per batch without the per-row save signals,
+    the cache is refreshed once at the end and the other processes are told to reload. The
+    requirement rows of a batch are rebuilt from the caches with one delete and one insert.
+    """
+    report = ImportReport()
+    records, report.errors = validate(read_records(stream, format))
+    report.rows = len(records)
+    existing = await fetch_existing(x["name"] for _, x in records)
+    report.errors.extend(check_existing(records, existing))
+    if report.errors:
+        return report
+    rows = [values for _, values in records]
+    if dry_run:
+        report.updated = sum(1 for x in rows if x["name"].lower() in existing)
+        report.created = report.rows - report.updated
+        return report
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        async with in_transaction() as connection:
+            existing = await fetch_existing((x["name"] for x in batch), using_db=connection)
+            # updates only write the fields present in their record, grouped by field set
+            to_update: dict[tuple[str, ...], list[Achievement]] = {}
+            to_create = []
+            for values in batch:
+                achievement = existing.get(values["name"].lower())
+                if achievement is None:
+                    to_create.append(Achievement(**values))
+                    continue
+                achievement.update_from_dict(values)
+                fields = tuple(sorted(x for x in values if x != "name"))
+                if fields:
+                    to_update.setdefault(fields, []).append(achievement)
+            for fields, group in to_update.items():
+                await Achievement.bulk_update(group, fields=list(fields), using_db=connection)
+            if to_create:
+                await Achievement.bulk_create(to_create, using_db=connection)
+            saved = await Achievement.filter(name__in=[x["name"] for x in batch]).using_db(
+                connection
+            )
+            # every name was validated against the caches, no need to resolve them again
+            await AchievementRequirement.filter(
+                achievement_id__in=[x.pk for x in saved]
+            ).using_db(connection).delete()
+            await AchievementRequirement.bulk_create(
+                [
+                    instance
+                    for achievement in saved
+                    for instance in requirement_instances(
+                        achievement.pk,
+                        requirement_rows(
+                            achievement.requirements, ball_pks_by_country, special_pks_by_name
+                        ),
+                    )
+                ],
+                using_db=connection,
+            )
+        report.created += len(to_create)
+        report.updated += len(batch) - len(to_create)
+        for achievement in saved:
+            achievements[achievement.pk] = achievement
+
+    index_achievement_requirements()
+    await invalidation_bus.publish("achievement", None, "import")
+    log.info(f"Imported {report.rows} achievements: {report}")
+    return report
+
+
+async def export_achievements(format: str, *, batch_size: int = 500) -> AsyncIterator[str]:
+    """
+    Yield the achievement catalogue as JSON Lines or CSV, fetched by batches of pk.
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, FIELDS)
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    last_id = 0
+    while True:
+        batch = await Achievement.filter(id__gt=last_id).order_by("id").limit(batch_size)
+        if not batch:
+            return
+        last_id = batch[-1].pk
+        for achievement in batch:
+            record = {x: getattr(achievement, x) for x in FIELDS}
+            record["firstball_scope"] = achievement.firstball_scope.name.lower()
+            for key in ("start_date", "end_date"):
+                if record[key] is not None:
+                    record[key] = record[key].isoformat()
+            if format == "csv":
+                buffer = io.StringIO()
+                csv.DictWriter(buffer, FIELDS).writerow(
+                    {k: "" if v is None else v for k, v in record.items()}
+                )
+                yield buffer.getvalue()
+            else:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
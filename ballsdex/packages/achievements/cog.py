@@ -3,22 +3,37 @@ from typing import TYPE_CHECKING
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ui import Button, View, button
-from tortoise.exceptions import DoesNotExist
-from tortoise.functions import Count
 
+from ballsdex.core import models
 from ballsdex.core.models import (
-    Ball,
-    BallInstance,
     Achievement,
     Player,
-    AchievementInstance,
-    achievements
+    achievement_schedule,
+    achievements,
+    balls,
+    index_achievement_requirements,
 )
 from ballsdex.core.utils.transformers import AchievementAchievableTransform
-from ballsdex.core.utils.achievements import check_if_achieved
-from ballsdex.core.utils.paginator import FieldPageSource, Pages
+from ballsdex.core.utils.achievement_cache import achievement_cache
+from ballsdex.core.utils.achievement_metrics import install_query_tracing, observe
+from ballsdex.core.utils.achievement_search import achievement_index
+from ballsdex.core.utils.achievement_stats import achievement_stats
+from ballsdex.core.utils.achievements import (
+    PlayerProgress,
+    achieved_memo,
+    award_achievements,
+    evaluations,
+    get_achieved,
+    get_missing_requirements,
+    has_achievement,
+    owned_balls,
+)
+from ballsdex.core.utils.first_catch import first_catches
+from ballsdex.core.utils.invalidation import InvalidationEvent, invalidation_bus
+from ballsdex.core.utils.paginator import FieldPageSource, LazyFieldPageSource, Pages
+from ballsdex.packages.achievements.worker import AchievementWorker
 from ballsdex.settings import settings
 
 if TYPE_CHECKING:
@@ -28,6 +43,33 @@ log = logging.getLogger("ballsdex.packages.countryballs")
 
 DEFAULT_AVATAR_URL = 'https://archive.org/download/discordprofilepictures/discordblue.png'
 
+
+def format_achievement(achievement: Achievement, achieved: set[int]) -> tuple[str, str]:
+    if achievement.pk in achieved:
+        owned = "👑 Achieved! 👑"
+    else:
+        owned = "⏳ Not achieved yet. ⏳"
+
+    if achievement.simplified_req:
+        requirements = f"- {achievement.simplified_req}"
+    else:
+        requirements = '\n'.join(f"- {req}" for req in achievement.compiled.requirement_names) or "- None"
+
+    return (f"**{achievement.name} ({owned}):**", f"Requirements:\n{requirements}{format_rarity(achievement)}")
+
+
+def format_progress_bar(ratio: float, width: int = 10) -> str:
+    filled = round(ratio * width)
+    return "▰" * filled + "▱" * (width - filled)
+
+
+def format_rarity(achievement: Achievement) -> str:
+    rarity = achievement_stats.rarity(achievement.pk)
+    if rarity is None:
+        return ""
+    return f"\nHeld by {rarity:.1%} of players"
+
+
 class Achievements(commands.GroupCog, group_name="achievements"):
     """
     View and manage your achievements.
@@ -35,6 +77,52 @@ class Achievements(commands.GroupCog, group_name="achievements"):
 
     def __init__(self, bot: "BallsDexBot"):
         self.bot = bot
+        self.worker = AchievementWorker()
+
+    async def cog_load(self):
+        install_query_tracing()
+        await first_catches.load()
+        self.worker.start()
+        self.reconcile_stats.start()
+        invalidation_bus.subscribe("achievement", self.reload_achievement)
+        try:
+            await invalidation_bus.start()
+        except Exception:
+            log.exception("Failed to start the invalidation bus, achievement edits made "
+                          "by other processes will need a cache reload")
+
+    async def cog_unload(self):
+        self.reconcile_stats.cancel()
+        await self.worker.stop()
+        invalidation_bus.unsubscribe("achievement", self.reload_achievement)
+        await invalidation_bus.stop()
+        achievement_cache.stop()
+        # the next start restores the cache from it
+        await achievement_cache.save()
+
+    async def reload_achievement(self, event: InvalidationEvent):
+        """
+        Refresh the cached achievement changed by another process (admin panel, other cluster).
+        """
+        if event.pk is None:
+            achievements.clear()
+            for achievement in await Achievement.all():
+                achievements[achievement.pk] = achievement
+        else:
+            achievement = await Achievement.get_or_none(pk=event.pk)
+            if achievement is None:
+                achievements.pop(event.pk, None)
+            else:
+                achievements[event.pk] = achievement
+        # only the fetched achievements are compiled
+        index_achievement_requirements(recompile=False)
+
+    @tasks.loop(hours=1)
+    async def reconcile_stats(self):
+        try:
+            await achievement_stats.reconcile()
+        except Exception:
+            log.exception("Failed to reconcile achievement stats")
 
     rewards = app_commands.Group(name="rewards", description="Manage rewards")
 
@@ -43,32 +131,27 @@ class Achievements(commands.GroupCog, group_name="achievements"):
         """
         Displays the list of achievements in the bot (and if you have achieved them or not)
         """
-        achievements = await Achievement.all()
-        bot_achievements = [a for a in achievements if a.achievable]
-
-        entries = []
-        for a in bot_achievements:
-            result = await check_if_achieved(interaction.user.id, a.name)
-            if result == True:
-                owned = "👑 Achieved! 👑"
-            else:
-                owned = "⏳ Not achieved yet. ⏳"
+        bot_achievements = [a for a in achievements.values() if a.achievable]
 
-            if a.simplified_req:
-                requirements = f"- {a.simplified_req}"
-            else:
-                requirements = str(a.requirements).split(';')
-                requirements = '\n'.join(f"- {req.strip()}" for req in requirements)
-            
-            entries.append((f"**{a.name} ({owned}):**", f"Requirements:\n{requirements}"))
-        
-        if len(entries) == 0:
+        if len(bot_achievements) == 0:
             await interaction.response.send_message("There are no achievements registered on this bot.", ephemeral=True)
             return
-        
+
+        achieved = await get_achieved(interaction.user.id, achieved_memo(interaction))
+
+        async def render(a: Achievement):
+            return format_achievement(a, achieved)
+
         avatar_url = interaction.user.avatar.url if interaction.user.avatar else DEFAULT_AVATAR_URL
         
-        source = FieldPageSource(entries, per_page=1, inline=False, clear_description=False)
+        source = LazyFieldPageSource(
+            bot_achievements,
+            render,
+            memo_key=("list", interaction.user.id, models.achievements_version, len(achieved)),
+            per_page=1,
+            inline=False,
+            clear_description=False,
+        )
         source.embed.description = "**List of Achievements**"
         source.embed.colour = discord.Colour.blurple()
         source.embed.set_thumbnail(url=avatar_url)
@@ -86,46 +169,42 @@ class Achievements(commands.GroupCog, group_name="achievements"):
         achievement: Achievement
             Filter by specific achievement.
         """
-        bot_achievements = await Achievement.all() if achievement is None else [achievement]
+        if achievement is not None and not achievement_schedule.active(achievement.pk):
+            await interaction.response.send_message(
+                f"The achievement **{achievement}** can't be obtained right now.", ephemeral=True
+            )
+            return
+        inactive = achievement_schedule.inactive()
+        bot_achievements = (
+            [a for a in achievements.values() if a.pk not in inactive]
+            if achievement is None
+            else [achievement]
+        )
         message = []
         missing_balls_set = set()
 
         await interaction.response.send_message("Checking for achievements...", ephemeral=True)
 
-        for a in bot_achievements:
-            requirements = set(str(a.requirements).split(";"))
-            filters = {"player__discord_id": interaction.user.id, "ball__country__in": requirements}
-            balls = await BallInstance.filter(**filters).select_related('ball')
-            ball_names = {ball.ball.country for ball in balls}
-            missing_balls = requirements - ball_names
+        with observe("check"):
+            player = await Player.get_or_none(discord_id=interaction.user.id)
+            completed = []
+            for a in bot_achievements:
+                if a.firstball or a.compiled.empty:
+                    continue
+                missing_balls = await get_missing_requirements(player.pk if player else None, a)
             
-            if not missing_balls:
-                player = await Player.get(discord_id=interaction.user.id)
-                has_a = await check_if_achieved(interaction.user.id, a.name)
-
-                if not has_a:
-                    rewards = str(a.rewards).split(";")
-                    if rewards:
-                        for r in rewards:
-                            shiny = False
-                            if r.startswith("✨ "):
-                                split_r = r[2:].split()
-                                if len(split_r) > 0:
-                                    reward = split_r[0]
-                                    shiny = True
-                                else:
-                                    continue
-                            else:
-                                reward = r.strip()
-                            try:
-                                b = await Ball.get(country=reward)
-                                await BallInstance.create(ball=b, player=player, shiny=shiny)
-                            except DoesNotExist:
-                                continue
-                    await AchievementInstance.create(achievement=a, player=player)
-                    message.append(f"Found and gave missing achievement: **{a.name}**\n")
-            else:
-                missing_balls_set.update(missing_balls)
+                if not missing_balls:
+                    completed.append(a)
+                else:
+                    missing_balls_set.update(missing_balls)
+
+            if completed:
+                # spamming the command while a check is running shares its result
+                key = (player.pk, achievement.pk if achievement else None)
+                awarded = await evaluations.run(
+                    key, award_achievements, player, completed, interaction.guild_id
+                )
+                message.extend(f"Found and gave missing achievement: **{a.name}**\n" for a in awarded)
 
         if missing_balls_set and achievement:
             nonemsg = (f"You have not met the requirements for the achievement **{achievement}**! You still need these {settings.plural_collectible_name}:\n" + 
@@ -134,8 +213,7 @@ class Achievements(commands.GroupCog, group_name="achievements"):
             if achievement is None:
                 nonemsg = "No new achievements found."
             else:
-                has_a = await check_if_achieved(interaction.user.id, achievement.name)
-                if has_a:
+                if await has_achievement(interaction.user.id, achievement.pk):
                     nonemsg = "You already have this achievement!"
                 else:
                     nonemsg = "No new achievements found."
@@ -145,28 +223,64 @@ class Achievements(commands.GroupCog, group_name="achievements"):
         else:
             await interaction.followup.send(nonemsg, ephemeral=True)
 
-        
+    @app_commands.command()
+    async def progress(self, interaction: discord.Interaction):
+        """
+        Displays how close you are to completing each achievement.
+        """
+        inactive = achievement_schedule.inactive()
+        bot_achievements = [
+            a
+            for a in achievements.values()
+            if a.achievable and not a.firstball and not a.compiled.empty and a.pk not in inactive
+        ]
+        if len(bot_achievements) == 0:
+            await interaction.response.send_message("There are no achievements registered on this bot.", ephemeral=True)
+            return
+
+        with observe("progress"):
+            player = await Player.get_or_none(discord_id=interaction.user.id)
+            progress = await owned_balls.get(player.pk) if player else PlayerProgress()
+            achieved = await get_achieved(interaction.user.id, achieved_memo(interaction))
+
+        rows = []
+        for a in bot_achievements:
+            done, total = a.compiled.progress(progress)
+            rows.append((a.pk in achieved, done / total if total else 0, a, done, total))
+        # held achievements last, then the closest ones first
+        rows.sort(key=lambda row: (row[0], -row[1], row[2].name))
+
+        entries = []
+        for held, ratio, a, done, total in rows:
+            if held:
+                entries.append((f"**{a.name}** 👑", "Achieved!"))
+            else:
+                entries.append((f"**{a.name}**", f"{format_progress_bar(ratio)} {done}/{total} ({ratio:.0%})"))
+
+        avatar_url = interaction.user.avatar.url if interaction.user.avatar else DEFAULT_AVATAR_URL
+
+        source = FieldPageSource(entries, per_page=10, inline=False, clear_description=False)
+        source.embed.description = "**Achievements Progress**"
+        source.embed.colour = discord.Colour.blurple()
+        source.embed.set_thumbnail(url=avatar_url)
+        pages = Pages(source=source, interaction=interaction, compact=True)
+        await pages.start()
+
     @rewards.command(name="list")
     async def rewards_list(self, interaction: discord.Interaction):
         """
         Displays the list of achievements and their rewards
         """
-        achievements = await Achievement.filter(achievable=True)
         entries = []
-        for a in achievements:
-            if a.rewards:
-                rewards = str(a.rewards).split(';')
-                reward_count = {}
-                for reward in rewards:
-                    cleaned_reward = reward.strip()
-                    if cleaned_reward:
-                        if cleaned_reward in reward_count:
-                            reward_count[cleaned_reward] += 1
-                        else:
-                            reward_count[cleaned_reward] = 1
-
-                rewards = '\n'.join(f"- {count}x {reward}" if count > 1 else f"- {reward}" 
-                                    for reward, count in reward_count.items())
+        for a in achievements.values():
+            if not a.achievable:
+                continue
+            if a.compiled.rewards:
+                rewards = '\n'.join(
+                    f"- {count}x {'✨ ' if shiny else ''}{balls[ball_id].country}" if count > 1
+                    else f"- {'✨ ' if shiny else ''}{balls[ball_id].country}"
+                    for ball_id, shiny, count in a.compiled.rewards
+                )
             else:
                 rewards = "- No rewards for this achievement."
             
@@ -194,35 +308,93 @@ class Achievements(commands.GroupCog, group_name="achievements"):
         keyword: str
             The keyword you want to search by.
         """
-        achievements = await Achievement.filter(achievable=True)
-        results = [a for a in achievements if keyword.lower() in a.name.lower()]
-
-        entries = []
-        for a in results:
-            result = await check_if_achieved(interaction.user.id, a.name)
-            if result == True:
-                owned = "👑 Achieved! 👑"
-            else:
-                owned = "⏳ Not achieved yet. ⏳"
+        results = achievement_index.search(keyword, limit=None)
 
-            if a.simplified_req:
-                requirements = f"- {a.simplified_req}"
-            else:
-                requirements = str(a.requirements).split(';')
-                requirements = '\n'.join(f"- {req.strip()}" for req in requirements)
-            
-            entries.append((f"**{a.name} ({owned}):**", f"Requirements:\n{requirements}"))
-        
-        if len(entries) == 0:
+        if len(results) == 0:
             await interaction.response.send_message("No achievements found.", ephemeral=True)
             return
-        
+
+        achieved = await get_achieved(interaction.user.id, achieved_memo(interaction))
+
+        async def render(a: Achievement):
+            return format_achievement(a, achieved)
+
         avatar_url = interaction.user.avatar.url if interaction.user.avatar else DEFAULT_AVATAR_URL
         
-        source = FieldPageSource(entries, per_page=1, inline=False, clear_description=False)
+        source = LazyFieldPageSource(
+            results,
+            render,
+            memo_key=("search", keyword.lower(), interaction.user.id, models.achievements_version, len(achieved)),
+            per_page=1,
+            inline=False,
+            clear_description=False,
+        )
         source.embed.description = f"**Search Results** (searched: {keyword})"
         source.embed.colour = discord.Colour.blurple()
         source.embed.set_thumbnail(url=avatar_url)
         pages = Pages(source=source, interaction=interaction, compact=True)
         await pages.start()
         await interaction.followup.send("TIP: Use /achievements check to see if you have any achievements!", ephemeral=True)
+
+    @app_commands.command()
+    async def leaderboard(self, interaction: discord.Interaction):
+        """
+        Displays the players with the most achievements.
+        """
+        board = achievement_stats.leaderboard(25)
+        if not board:
+            await interaction.response.send_message("No one has any achievement yet.", ephemeral=True)
+            return
+
+        entries = [
+            (f"#{i}", f"<@{discord_id}>: **{count}** achievement{'s' if count > 1 else ''}")
+            for i, (discord_id, count) in enumerate(board, start=1)
+        ]
+        source = FieldPageSource(entries, per_page=5, inline=False, clear_description=False)
+        source.embed.description = "**Achievements Leaderboard**"
+        source.embed.colour = discord.Colour.blurple()
+        pages = Pages(source=source, interaction=interaction, compact=True)
+        await pages.start()
+
+    @app_commands.command()
+    async def rarity(self, interaction: discord.Interaction, achievement: AchievementAchievableTransform | None = None):
+        """
+        Displays how many players hold the achievements, rarest first.
+
+        Parameters
+        ----------
+        achievement: Achievement
+            Show the details of a specific achievement.
+        """
+        if achievement_stats.last_reconcile is None:
+            await interaction.response.send_message(
+                "Achievement statistics are still being computed, try again later.", ephemeral=True
+            )
+            return
+
+        if achievement is not None:
+            holders = achievement_stats.holders.get(achievement.pk, 0)
+            text = f"**{achievement.name}** is held by {holders} players{format_rarity(achievement)}."
+            if interaction.guild_id:
+                in_guild = achievement_stats.guild_holders.get(interaction.guild_id, {}).get(achievement.pk, 0)
+                text += f"\n{in_guild} of them got it in this server."
+            await interaction.response.send_message(text, ephemeral=True)
+            return
+
+        bot_achievements = sorted(
+            (a for a in achievements.values() if a.achievable),
+            key=lambda a: achievement_stats.holders.get(a.pk, 0),
+        )
+        entries = [
+            (f"**{a.name}:**", f"{achievement_stats.holders.get(a.pk, 0)} holders{format_rarity(a)}")
+            for a in bot_achievements
+        ]
+        if len(entries) == 0:
+            await interaction.response.send_message("There are no achievements registered on this bot.", ephemeral=True)
+            return
+
+        source = FieldPageSource(entries, per_page=5, inline=False, clear_description=False)
+        source.embed.description = "**Achievements Rarity**"
+        source.embed.colour = discord.Colour.blurple()
+        pages = Pages(source=source, interaction=interaction, compact=True)
+        await pages.start()
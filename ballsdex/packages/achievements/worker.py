@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import discord
+
+from ballsdex.core.models import Player, achievements, achievements_by_ball
+from ballsdex.core.utils.achievement_metrics import observe, worker_queue_depth, worker_rejected
+from ballsdex.core.utils.achievements import award_achievements
+from ballsdex.core.utils.first_catch import award_first_catch
+
+log = logging.getLogger("ballsdex.packages.achievements.worker")
+
+
+@dataclass
+class CatchEvent:
+    """
+    A player obtained a ball. The interaction is used to post the achievement notifications.
+    """
+
+    player: Player
+    ball_id: int
+    interaction: discord.Interaction
+
+
+async def evaluate_events(events: list[CatchEvent]):
+    """
+    Award the achievements completed by these events (all from the same player and server),
+    and the firstball achievements of the first catches, then notify the player through the
+    most recent interaction.
+    """
+    player = events[-1].player
+    interaction = events[-1].interaction
+    awarded = []
+    with observe("catch"):
+        for event in events:
+            awarded.extend(
+                await award_first_catch(event.player, event.ball_id, event.interaction.guild_id)
+            )
+        candidates: set[int] = set()
+        for event in events:
+            candidates.update(achievements_by_ball.get(event.ball_id, ()))
+        if candidates:
+            awarded.extend(
+                await award_achievements(
+                    player,
+                    [achievements[pk] for pk in candidates if pk in achievements],
+                    interaction.guild_id,
+                )
+            )
+    if not awarded:
+        return
+
+    await interaction.followup.send(
+        "\n".join(
+            f"{interaction.user.mention} Congratulations, you just got a new achievement!: "
+            f"**{a.name}**"
+            for a in awarded
+        ),
+        allowed_mentions=discord.AllowedMentions(users=player.can_be_mentioned),
+    )
+
+
+class AchievementWorker:
+    """
+    Evaluates achievements in the background so catches don't wait for them.
+
+    Events are consumed in batches of up to `batch_size`, events of the same player in the
+    same server within a batch are evaluated together. The queue holds at most `maxsize` events, `submit` returns
+    False past that and the caller is expected to evaluate inline instead.
+    """
+
+    def __init__(self, maxsize: int = 1000, batch_size: int = 50):
+        self.queue: asyncio.Queue[CatchEvent] = asyncio.Queue(maxsize)
+        self.batch_size = batch_size
+        self.task: asyncio.Task | None = None
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.processed = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+        worker_queue_depth.set_function(self.queue.qsize)
+        worker_rejected.set_function(lambda: self.rejected)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 30):
+        """
+        Wait for the queued events to be processed, then stop the worker.
+        """
+        if self.task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Dropping {self.queue.qsize()} achievement events on shutdown")
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    def submit(self, event: CatchEvent) -> bool:
+        if self.task is None or self.task.done():
+            return False
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self.process(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def process(self, batch: list[CatchEvent]):
+        # awards are recorded for a server and notified in its channel, don't mix servers
+        per_player: dict[tuple[int, int | None], list[CatchEvent]] = {}
+        for event in batch:
+            key = (event.player.pk, event.interaction.guild_id)
+            per_player.setdefault(key, []).append(event)
+        self.coalesced += len(batch) - len(per_player)
+
+        for events in per_player.values():
+            try:
+                await evaluate_events(events)
+            except Exception:
+                log.exception(f"Failed to evaluate achievements of player {events[0].player.pk}")
+            self.processed += len(events)
@@ -8,12 +8,17 @@ from typing import TYPE_CHECKING, cast
 import discord
 from discord.ui import Button, Modal, TextInput, View
 from prometheus_client import Counter
-from tortoise.exceptions import DoesNotExist
 from tortoise.timezone import now as datetime_now
 
-from ballsdex.core.models import BallInstance, GuildConfig, Player, specials, Achievement, AchievementInstance, Ball
+from ballsdex.core.models import (
+    BallInstance,
+    Player,
+    specials,
+)
+from ballsdex.core.utils.catch_names import catch_names
+from ballsdex.core.utils.guild_config import guild_configs
 from ballsdex.settings import settings
-from ballsdex.core.utils.achievements import check_if_achieved
+from ballsdex.packages.achievements.worker import CatchEvent, evaluate_events
 
 if TYPE_CHECKING:
     from ballsdex.core.bot import BallsDexBot
@@ -39,10 +44,7 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
         self.button = button
 
     async def on_error(self, interaction: discord.Interaction, error: Exception, /) -> None:
-        try:
-            config = await GuildConfig.get(guild_id=interaction.guild_id)
-        except DoesNotExist:
-            config = await GuildConfig.create(guild_id=interaction.guild_id, spawn_channel=None)
+        config = await guild_configs.get(interaction.guild_id)
         log.exception("An error occured in countryball catching prompt", exc_info=error)
         if interaction.response.is_done():
             await interaction.followup.send(
@@ -56,12 +58,8 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
             )
 
     async def on_submit(self, interaction: discord.Interaction["BallsDexBot"]):
-        # TODO: use lock
         player, created = await Player.get_or_create(discord_id=interaction.user.id)
-        try:
-            config = await GuildConfig.get(guild_id=interaction.guild_id)
-        except DoesNotExist:
-            config = await GuildConfig.create(guild_id=interaction.guild_id, spawn_channel=None)
+        config = await guild_configs.get(interaction.guild_id)
 
         if self.ball.catched:
             await interaction.response.send_message(
@@ -71,14 +69,7 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
             )
             return
 
-        if self.ball.model.catch_names:
-            possible_names = (self.ball.name.lower(), *self.ball.model.catch_names.split(";"))
-        else:
-            possible_names = (self.ball.name.lower(),)
-        if self.ball.model.translations:
-            possible_names += tuple(x.lower() for x in self.ball.model.translations.split(";"))
-
-        if self.name.value.lower().strip() in possible_names:
+        if catch_names.matches(self.ball.model, self.name.value):
             self.ball.catched = True
             await interaction.response.defer(thinking=True)
             ball, has_caught_before = await self.catch_ball(
@@ -86,39 +77,6 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
             )
 
             special = ""
-            bot_achievements = await Achievement.all()
-            for a in bot_achievements:
-                requirements = set(str(a.requirements).split(";"))
-                filters = {"player__discord_id": interaction.user.id, "ball__country__in": requirements}
-                balls = await BallInstance.filter(**filters).select_related('ball')
-                ball_names = {ball.ball.country for ball in balls}
-                missing_balls = requirements - ball_names
-                
-                if not missing_balls:
-                    player = await Player.get(discord_id=interaction.user.id)
-                    has_a = await check_if_achieved(interaction.user.id, a.name)
-
-                    if not has_a:
-                        rewards = str(a.rewards).split(";")
-                        if rewards:
-                            for r in rewards:
-                                shiny = False
-                                if r.startswith("✨ "):
-                                    split_r = r[2:].split()
-                                    if len(split_r) > 0:
-                                        reward = split_r[0]
-                                        shiny = True
-                                    else:
-                                        continue
-                                else:
-                                    reward = r.strip()
-                                try:
-                                    b = await Ball.get(country=reward)
-                                    await BallInstance.create(ball=b, player=player, shiny=shiny)
-                                except DoesNotExist:
-                                    continue
-                        await AchievementInstance.create(achievement=a, player=player)
-                        special += f"Congratulations, you just got a new achievement!: **{a.name}**\n"
             if ball.shiny:
                 special += f"✨ ***It's a shiny {settings.collectible_name}!*** ✨\n"
             if ball.specialcard and ball.specialcard.catch_phrase:
@@ -136,6 +94,12 @@ class CountryballNamePrompt(Modal, title=f"Catch this {settings.collectible_name
             )
             self.button.disabled = True
             await interaction.followup.edit_message(self.ball.message.id, view=self.button.view)
+
+            event = CatchEvent(player, ball.ball_id, interaction)
+            worker = getattr(interaction.client.get_cog("Achievements"), "worker", None)
+            if worker is None or not worker.submit(event):
+                # achievements package not loaded or queue full, evaluate inline
+                await evaluate_events([event])
         else:
             await interaction.response.send_message(
                 f"{interaction.user.mention} Wrong name!",
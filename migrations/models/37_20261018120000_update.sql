@@ -0,0 +1,16 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "achievementrequirement" (
+    "id" SERIAL PRIMARY KEY,
+    "achievement_id" INT NOT NULL REFERENCES "achievement" ("id") ON DELETE CASCADE,
+    "ball_id" INT NOT NULL REFERENCES "ball" ("id") ON DELETE CASCADE,
+    CONSTRAINT "unique_achievement_requirement" UNIQUE ("achievement_id", "ball_id")
+);
+CREATE INDEX IF NOT EXISTS "idx_achievementrequirement_ball_id" ON "achievementrequirement" ("ball_id");
+INSERT INTO "achievementrequirement" ("achievement_id", "ball_id")
+SELECT DISTINCT "achievement"."id", "ball"."id"
+FROM "achievement"
+CROSS JOIN LATERAL unnest(string_to_array("achievement"."requirements", ';')) AS "requirement" ("name")
+JOIN "ball" ON "ball"."country" = trim("requirement"."name")
+ON CONFLICT DO NOTHING;
+-- downgrade --
+DROP TABLE IF EXISTS "achievementrequirement";
@@ -0,0 +1,29 @@
+-- upgrade --
+ALTER TABLE "achievementrequirement" ADD "clause" SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE "achievementrequirement" ADD "quantity" INT NOT NULL DEFAULT 1;
+ALTER TABLE "achievementrequirement" ADD "shiny" BOOL NOT NULL DEFAULT False;
+ALTER TABLE "achievementrequirement" ADD "needed" SMALLINT NOT NULL DEFAULT 1;
+COMMENT ON COLUMN "achievementrequirement"."clause" IS 'Index of the clause in the requirements';
+COMMENT ON COLUMN "achievementrequirement"."quantity" IS 'Copies required of this ball';
+COMMENT ON COLUMN "achievementrequirement"."shiny" IS 'Only shiny copies count';
+COMMENT ON COLUMN "achievementrequirement"."needed" IS 'Balls of the clause that must be owned';
+-- every existing row is a plain ball name, its own clause
+UPDATE "achievementrequirement" SET "clause" = "numbered"."clause"
+FROM (
+    SELECT "id", ROW_NUMBER() OVER (PARTITION BY "achievement_id" ORDER BY "id") - 1 AS "clause"
+    FROM "achievementrequirement"
+) AS "numbered"
+WHERE "achievementrequirement"."id" = "numbered"."id";
+ALTER TABLE "achievementrequirement" DROP CONSTRAINT IF EXISTS "unique_achievement_requirement";
+ALTER TABLE "achievementrequirement" ADD CONSTRAINT "unique_achievement_requirement" UNIQUE ("achievement_id", "clause", "ball_id");
+-- downgrade --
+DELETE FROM "achievementrequirement" WHERE "quantity" != 1 OR "shiny" OR "needed" != 1;
+ALTER TABLE "achievementrequirement" DROP CONSTRAINT IF EXISTS "unique_achievement_requirement";
+DELETE FROM "achievementrequirement" WHERE "id" NOT IN (
+    SELECT MIN("id") FROM "achievementrequirement" GROUP BY "achievement_id", "ball_id"
+);
+ALTER TABLE "achievementrequirement" ADD CONSTRAINT "unique_achievement_requirement" UNIQUE ("achievement_id", "ball_id");
+ALTER TABLE "achievementrequirement" DROP COLUMN "clause";
+ALTER TABLE "achievementrequirement" DROP COLUMN "quantity";
+ALTER TABLE "achievementrequirement" DROP COLUMN "shiny";
+ALTER TABLE "achievementrequirement" DROP COLUMN "needed";
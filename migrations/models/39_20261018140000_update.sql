@@ -0,0 +1,14 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "idx_ballinstance_player_ball" ON "ballinstance" ("player_id", "ball_id") INCLUDE ("shiny");
+CREATE INDEX IF NOT EXISTS "idx_achievementinstance_achievement" ON "achievementinstance" ("achievement_id");
+-- schemas generated from the models only had a unique ("player_id", "id"), drop the duplicates
+DELETE FROM "achievementinstance" WHERE "id" NOT IN (
+    SELECT MIN("id") FROM "achievementinstance" GROUP BY "player_id", "achievement_id"
+);
+ALTER TABLE "achievementinstance" DROP CONSTRAINT IF EXISTS "unique_player_achievement";
+ALTER TABLE "achievementinstance" ADD CONSTRAINT "unique_player_achievement" UNIQUE ("player_id", "achievement_id");
+ANALYZE "ballinstance";
+ANALYZE "achievementinstance";
+-- downgrade --
+DROP INDEX IF EXISTS "idx_ballinstance_player_ball";
+DROP INDEX IF EXISTS "idx_achievementinstance_achievement";
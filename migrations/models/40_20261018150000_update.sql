@@ -0,0 +1,21 @@
+-- upgrade --
+ALTER TABLE "achievement" ADD "firstball_scope" SMALLINT NOT NULL DEFAULT 1;
+COMMENT ON COLUMN "achievement"."firstball_scope" IS 'First catch of the whole bot or of each server';
+CREATE TABLE IF NOT EXISTS "firstcatch" (
+    "id" SERIAL PRIMARY KEY,
+    "ball_id" INT NOT NULL REFERENCES "ball" ("id") ON DELETE CASCADE,
+    "server_id" BIGINT NOT NULL DEFAULT 0,
+    "player_id" INT NOT NULL REFERENCES "player" ("id") ON DELETE CASCADE,
+    "caught_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "unique_first_catch" UNIQUE ("ball_id", "server_id")
+);
+COMMENT ON COLUMN "firstcatch"."server_id" IS '0 for the first catch of the bot';
+-- balls caught before this migration already had their first catch
+INSERT INTO "firstcatch" ("ball_id", "server_id", "player_id", "caught_at")
+SELECT DISTINCT ON ("ball_id") "ball_id", 0, "player_id", "catch_date"
+FROM "ballinstance"
+ORDER BY "ball_id", "catch_date", "id"
+ON CONFLICT DO NOTHING;
+-- downgrade --
+DROP TABLE IF EXISTS "firstcatch";
+ALTER TABLE "achievement" DROP COLUMN "firstball_scope";
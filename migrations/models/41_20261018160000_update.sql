@@ -0,0 +1,20 @@
+-- upgrade --
+ALTER TABLE "achievement" ADD "start_date" TIMESTAMPTZ;
+ALTER TABLE "achievement" ADD "end_date" TIMESTAMPTZ;
+COMMENT ON COLUMN "achievement"."start_date" IS '(Optional) Can''t be obtained before this date';
+COMMENT ON COLUMN "achievement"."end_date" IS '(Optional) Can''t be obtained after this date';
+ALTER TABLE "achievementrequirement" ADD "windowed" BOOL NOT NULL DEFAULT False;
+ALTER TABLE "achievementrequirement" ADD "special_id" INT REFERENCES "special" ("id") ON DELETE CASCADE;
+COMMENT ON COLUMN "achievementrequirement"."windowed" IS 'Only balls caught during the achievement''s window count';
+-- range scans on the catch date of a player's copies of a ball, the previous index is a prefix of it
+CREATE INDEX IF NOT EXISTS "idx_ballinstance_player_ball_catch" ON "ballinstance" ("player_id", "ball_id", "catch_date") INCLUDE ("shiny", "special_id");
+DROP INDEX IF EXISTS "idx_ballinstance_player_ball";
+ANALYZE "ballinstance";
+-- downgrade --
+CREATE INDEX IF NOT EXISTS "idx_ballinstance_player_ball" ON "ballinstance" ("player_id", "ball_id") INCLUDE ("shiny");
+DROP INDEX IF EXISTS "idx_ballinstance_player_ball_catch";
+DELETE FROM "achievementrequirement" WHERE "windowed" OR "special_id" IS NOT NULL;
+ALTER TABLE "achievementrequirement" DROP COLUMN "windowed";
+ALTER TABLE "achievementrequirement" DROP COLUMN "special_id";
+ALTER TABLE "achievement" DROP COLUMN "start_date";
+ALTER TABLE "achievement" DROP COLUMN "end_date";